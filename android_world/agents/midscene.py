@@ -5,10 +5,53 @@
 from android_world.agents import base_agent
 from android_world.env import interface
 
+import asyncio
+import collections
+from collections.abc import Sequence
+from concurrent import futures
+import itertools
+import json
 import requests
+from requests import adapters
+from urllib3 import exceptions as urllib3_exceptions
 import os
-import time
 import math
+import random
+import sys
+import time
+
+# Delays between attempts to reach the Midscene server. Only connection
+# failures, timeouts and gateway errors are retried; other HTTP errors are
+# raised right away.
+_RPC_RETRY_DELAYS_SECS = (0.1, 0.3, 0.9)
+_RETRIABLE_HTTP_STATUSES = (502, 503)
+# Methods that are safe to send twice. run-ai-method drives a whole task on the
+# server, so after a read timeout or a dropped connection it may already be
+# running and is only resent if the request never left the client.
+_IDEMPOTENT_METHODS = frozenset(("new-agent", "terminate-agent"))
+# Responses echoed in debug mode are cut off after this many characters.
+_MAX_LOGGED_RESPONSE_CHARS = 512
+
+try:
+  import orjson  # pytype: disable=import-error
+
+  _json_dumps = orjson.dumps
+  _json_loads = orjson.loads
+
+except ImportError:  # orjson is an optional, faster codec.
+
+  def _json_dumps(obj) -> bytes:
+    return json.dumps(obj).encode('utf-8')
+
+  _json_loads = json.loads
+
+
+def _request_was_not_sent(e: requests.RequestException) -> bool:
+  """Returns whether a request failed before it could reach the server."""
+  if isinstance(e, requests.ConnectTimeout):
+    return True
+  reason = getattr(e.args[0], "reason", None) if e.args else None
+  return isinstance(reason, urllib3_exceptions.NewConnectionError)
 
 
 class MidsceneAgent(base_agent.EnvironmentInteractingAgent):
@@ -20,8 +63,10 @@ class MidsceneAgent(base_agent.EnvironmentInteractingAgent):
     name: The agent name.
     """
     super().__init__(env, "MidsceneAgent")
-    self.history = []
-    self.run_log = []
+    # Bounded so that long benchmark runs do not keep every response alive.
+    run_log_max = int(os.environ.get("MIDSCENE_RUN_LOG_MAX", "256"))
+    self.history = collections.deque(maxlen=run_log_max)
+    self.run_log = collections.deque(maxlen=run_log_max)
     self._init_json_rpc();
     self.step_count = 0
     self.task_status = {}
@@ -33,7 +78,7 @@ class MidsceneAgent(base_agent.EnvironmentInteractingAgent):
 
   def start_new_task(self, task_name: str, task_id: str) -> None:
     """Starts a new task."""
-    self._formatted_console("Starting new task, name:  " + task_name + " id: " + task_id)
+    self._formatted_console(f"Starting new task, name:  {task_name} id: {task_id}")
     self.current_task_name = "Task-" + task_id + "-" +  str(task_name)
 
     device = { "type": "Android" }
@@ -54,11 +99,27 @@ class MidsceneAgent(base_agent.EnvironmentInteractingAgent):
       device["host"] = os.environ.get("ANDROID_REMOTE_HOST", "localhost")
       device["port"] = adb_port
 
-    self._send_rpc_request("new-agent", {"type": "Android", "device": device, "id": self.current_task_name})
+    new_agent_params = {"type": "Android", "device": device, "id": self.current_task_name}
+    if self._use_rpc_batch:
+      # Deferred so it shares a round trip with the first run-ai-method call.
+      self._pending_calls = [("new-agent", new_agent_params)]
+    else:
+      self._send_rpc_request("new-agent", new_agent_params)
 
     self.step_count = 0
 
 
+  def start_new_task_async(
+      self, task_name: str, task_id: str
+  ) -> futures.Future[None]:
+    """Starts a new task on a worker thread.
+
+    Lets the new-agent RPC overlap with work on the emulator side, such as
+    task initialization. The returned future must be resolved before this
+    agent is stepped.
+    """
+    return self._executor.submit(self.start_new_task, task_name, task_id)
+
   # Set max steps of all tasks to be 1
   def set_max_steps(self, max_steps: int) -> None:
     self._max_steps = 1
@@ -70,9 +131,9 @@ class MidsceneAgent(base_agent.EnvironmentInteractingAgent):
     """
     self.step_count += 1
 
-    self._formatted_console("Step: " + str(self.step_count)  + "; Goal: " + goal  )
+    self._formatted_console(f"Step: {self.step_count}; Goal: {goal}")
 
-    midscene_res = self._send_rpc_request("run-ai-method", {"id": self.current_task_name, "task": goal})
+    midscene_res = self._send_rpc_with_pending("run-ai-method", {"id": self.current_task_name, "task": goal})
 
 
     self.run_log.append(midscene_res)
@@ -98,47 +159,163 @@ class MidsceneAgent(base_agent.EnvironmentInteractingAgent):
         data={},
       )
 
+  async def step_async(self, goal: str) -> base_agent.AgentInteractionResult:
+    """Performs a step without blocking the event loop.
+
+    The blocking RPC runs on a worker thread, so steps of several agents can
+    be awaited together and overlap their time spent waiting on the server.
+    goal: The goal.
+    """
+    return await asyncio.to_thread(self.step, goal)
+
   def update_task_status(self, status: str = 'Failed') -> None:
     self.task_status[self.current_task_name] = status
-    self._send_rpc_request("terminate-agent", {"id": self.current_task_name, "userTaskStatus": self.task_status.get(self.current_task_name, 'Failed'),  'agentStepError':  self.failed_step_reason })
+    self._send_rpc_with_pending("terminate-agent", {"id": self.current_task_name, "userTaskStatus": self.task_status.get(self.current_task_name, 'Failed'),  'agentStepError':  self.failed_step_reason })
 
   def _init_json_rpc(self):
     """Initializes the JSON-RPC connection to the Midscene server."""
     self.rpc_url = os.environ.get("MIDSCENE_BENCH_RPC_URL")
     if not self.rpc_url:
       raise RuntimeError("MIDSCENE_BENCH_RPC_URL environment variable not set.")
+    # run-ai-method drives a whole task on the server, so there is no timeout
+    # unless one is explicitly configured.
+    rpc_timeout = os.environ.get("MIDSCENE_RPC_TIMEOUT")
+    self._rpc_timeout = float(rpc_timeout) if rpc_timeout else None
+
+    # Reuse one pooled session so every RPC after the first rides on a warm
+    # keep-alive connection instead of paying a fresh TCP handshake.
+    self._session = requests.Session()
+    adapter = adapters.HTTPAdapter(
+        pool_connections=4, pool_maxsize=16, max_retries=0
+    )
+    self._session.mount("http://", adapter)
+    self._session.mount("https://", adapter)
+    self._session.headers.update(
+        {'Content-Type': 'application/json', 'Connection': 'keep-alive'}
+    )
+    # Worker thread for RPCs that are dispatched without blocking the caller.
+    # A single worker keeps them in submission order; only start_new_task_async
+    # uses it.
+    self._executor = futures.ThreadPoolExecutor(max_workers=1)
+
+    # With batching on, new-agent is sent together with the following call in
+    # a single JSON-RPC 2.0 batch instead of paying its own round trip.
+    self._use_rpc_batch = os.environ.get("MIDSCENE_RPC_BATCH") == "1"
+    self._pending_calls: list[tuple[str, dict]] = []
+
+    # Responses can be large, so they are only echoed when debugging.
+    self._debug = bool(os.environ.get("MIDSCENE_DEBUG"))
+
+    # Integer ids are unique even for calls issued within the same batch.
+    self._rpc_id = itertools.count(1)
+
+  def close(self) -> None:
+    """Closes the pooled connections to the Midscene server."""
+    self._executor.shutdown(wait=True)
+    self._session.close()
 
   def _send_rpc_request(self, method: str, params: dict) -> dict:
     """Sends a JSON-RPC request to the Midscene server."""
-    headers = {'Content-Type': 'application/json'}
     payload = {
         "jsonrpc": "2.0",
         "method": method,
         "params": params,
-        "id": time.time()
+        "id": next(self._rpc_id)
     }
+    return self._post_json_rpc(payload)
 
-    request_cnt = 0;
-    response = None
+  def _send_rpc_batch(self, calls: list[tuple[str, dict]]) -> list[dict]:
+    """Sends several JSON-RPC requests in one batch round trip.
 
-    while request_cnt < 3:
-      request_cnt += 1
+    The server executes the calls in array order.
+    calls: (method, params) pairs.
+    Returns the responses in the same order as the calls.
+    """
+    payload = [
+        {"jsonrpc": "2.0", "method": method, "params": params, "id": next(self._rpc_id)}
+        for method, params in calls
+    ]
+    methods = ", ".join(method for method, _ in calls)
+    results = self._post_json_rpc(payload)
+    if not isinstance(results, list):
+      raise RuntimeError(
+          f"RPC batch [{methods}] got a non-batch reply: {results}"
+      )
+    # Batch responses may come back in any order, so match them up by id.
+    results_by_id = {r.get("id"): r for r in results if isinstance(r, dict)}
+    missing = [
+        call["method"] for call in payload if call["id"] not in results_by_id
+    ]
+    if missing:
+      raise RuntimeError(
+          f"RPC batch [{methods}] got no reply for: {', '.join(missing)}"
+      )
+    return [results_by_id[call["id"]] for call in payload]
+
+  def _send_rpc_with_pending(self, method: str, params: dict) -> dict:
+    """Sends a request, flushing any deferred calls in the same batch."""
+    if not self._pending_calls:
+      return self._send_rpc_request(method, params)
+    calls = self._pending_calls + [(method, params)]
+    self._pending_calls = []
+    results = self._send_rpc_batch(calls)
+    for (pending_method, _), result in zip(calls, results[:-1]):
+      self.run_log.append(result)
+      if "error" in result:
+        raise RuntimeError(f"RPC {pending_method} failed: {result['error']}")
+    return results[-1]
+
+  def _post_json_rpc(self, payload: dict | list[dict]) -> dict | list[dict]:
+    """Posts a JSON-RPC payload to the Midscene server and decodes the reply."""
+    # Serialized once up front; the session already sends the JSON
+    # Content-Type header.
+    body = _json_dumps(payload)
+    calls = payload if isinstance(payload, list) else [payload]
+    idempotent = all(call["method"] in _IDEMPOTENT_METHODS for call in calls)
+    for attempt, retry_delay in enumerate(_RPC_RETRY_DELAYS_SECS + (None,)):
       try:
-        response = requests.post(self.rpc_url, headers=headers, json=payload)
-        break
-      except Exception as e:
-        self._formatted_console("RPC Request Failed: " + str(e) + "; Retry: " + str(request_cnt))
-
-
-    if response is None:
-      raise RuntimeError(self._formatted_console("Failed to send RPC request"))
+        response = self._session.post(
+            self.rpc_url, data=body, timeout=self._rpc_timeout
+        )
+      except (requests.ConnectionError, requests.Timeout) as e:
+        self._formatted_console(f"RPC Request Failed: {e}; Retry: {attempt + 1}")
+        if retry_delay is None or not (
+            idempotent or _request_was_not_sent(e)
+        ):
+          raise RuntimeError("Failed to send RPC request") from e
+        if isinstance(e, requests.ConnectionError):
+          # Drop pooled connections, which may have been reset by the server.
+          self._session.close()
+      else:
+        if response.status_code not in _RETRIABLE_HTTP_STATUSES:
+          break
+        self._formatted_console(
+            f"RPC Request Failed with HTTP {response.status_code}; Retry:"
+            f" {attempt + 1}"
+        )
+        if retry_delay is None:
+          break
+      time.sleep(retry_delay + random.random() * 0.05)
 
     response.raise_for_status()
-    result = response.json()
-    self._formatted_console("RPC Response: " + str(result))
+    # Decoded straight from the raw bytes, skipping the intermediate str.
+    result = _json_loads(response.content)
+    if self._debug:
+      self._formatted_console(
+          f"RPC Response: {repr(result)[:_MAX_LOGGED_RESPONSE_CHARS]}"
+      )
 
     return result
 
   def _formatted_console(self, content: str) -> None:
     """Formats the console output."""
-    print("[MidsceneAgent] " + content)
\ No newline at end of file
+    sys.stdout.write(f"[MidsceneAgent] {content}\n")
+
+
+async def step_agents(
+    agents: Sequence[MidsceneAgent], goals: Sequence[str]
+) -> list[base_agent.AgentInteractionResult]:
+  """Steps several agents concurrently, one goal per agent."""
+  return await asyncio.gather(
+      *[agent.step_async(goal) for agent, goal in zip(agents, goals)]
+  )
@@ -0,0 +1,303 @@
+# Copyright 2025 The android_world Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import json
+import os
+import time
+from unittest import mock
+
+from absl.testing import absltest
+from android_world.agents import midscene
+from android_world.utils import test_utils
+import requests
+from urllib3 import exceptions as urllib3_exceptions
+
+
+def _create_response(result: object, status_code: int = 200) -> mock.MagicMock:
+  response = mock.MagicMock()
+  response.status_code = status_code
+  response.content = json.dumps(result).encode()
+  return response
+
+
+def _sent_payloads(mock_post: mock.MagicMock) -> list[object]:
+  return [json.loads(c.kwargs['data']) for c in mock_post.call_args_list]
+
+
+class MidsceneAgentTest(absltest.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.enter_context(
+        mock.patch.dict(
+            os.environ, {'MIDSCENE_BENCH_RPC_URL': 'http://localhost:1234'}
+        )
+    )
+    self.env = test_utils.FakeAsyncEnv()
+
+  def test_missing_rpc_url_raises(self):
+    with mock.patch.dict(os.environ, {'MIDSCENE_BENCH_RPC_URL': ''}):
+      with self.assertRaises(RuntimeError):
+        midscene.MidsceneAgent(self.env)
+
+  def test_requests_reuse_session(self):
+    agent = midscene.MidsceneAgent(self.env)
+    mock_post = self.enter_context(
+        mock.patch.object(agent._session, 'post', autospec=True)
+    )
+    mock_post.return_value = _create_response(
+        {'result': {'code': 1, 'data': 'done'}}
+    )
+
+    agent.start_new_task('TestTask', '1')
+    result = agent.step('do something')
+    agent.update_task_status('Successful')
+
+    self.assertTrue(result.done)
+    self.assertEqual(result.data, {'midscene_action_response': 'done'})
+    self.assertEqual(mock_post.call_count, 3)
+    payloads = _sent_payloads(mock_post)
+    self.assertEqual(
+        [p['method'] for p in payloads],
+        ['new-agent', 'run-ai-method', 'terminate-agent'],
+    )
+    self.assertEqual([p['id'] for p in payloads], [1, 2, 3])
+
+  def test_batch_sends_new_agent_with_first_step(self):
+    with mock.patch.dict(os.environ, {'MIDSCENE_RPC_BATCH': '1'}):
+      agent = midscene.MidsceneAgent(self.env)
+    mock_post = self.enter_context(
+        mock.patch.object(agent._session, 'post', autospec=True)
+    )
+    mock_post.return_value = _create_response([
+        {'id': 2, 'result': {'code': 1, 'data': 'done'}},
+        {'id': 1, 'result': {}},
+    ])
+
+    agent.start_new_task('TestTask', '1')
+    mock_post.assert_not_called()
+    result = agent.step('do something')
+
+    self.assertTrue(result.done)
+    self.assertEqual(mock_post.call_count, 1)
+    self.assertEqual(
+        [call['method'] for call in _sent_payloads(mock_post)[0]],
+        ['new-agent', 'run-ai-method'],
+    )
+    self.assertEqual(
+        list(agent.run_log),
+        [
+            {'id': 1, 'result': {}},
+            {'id': 2, 'result': {'code': 1, 'data': 'done'}},
+        ],
+    )
+
+  def test_batch_raises_on_non_batch_reply(self):
+    with mock.patch.dict(os.environ, {'MIDSCENE_RPC_BATCH': '1'}):
+      agent = midscene.MidsceneAgent(self.env)
+    self.enter_context(
+        mock.patch.object(
+            agent._session,
+            'post',
+            return_value=_create_response(
+                {'id': None, 'error': {'message': 'invalid request'}}
+            ),
+        )
+    )
+
+    agent.start_new_task('TestTask', '1')
+    with self.assertRaisesRegex(
+        RuntimeError, r'batch \[new-agent, run-ai-method\].*non-batch'
+    ):
+      agent.step('do something')
+
+  def test_batch_raises_on_missing_reply(self):
+    with mock.patch.dict(os.environ, {'MIDSCENE_RPC_BATCH': '1'}):
+      agent = midscene.MidsceneAgent(self.env)
+    self.enter_context(
+        mock.patch.object(
+            agent._session,
+            'post',
+            return_value=_create_response([{'id': 2, 'result': {}}]),
+        )
+    )
+
+    agent.start_new_task('TestTask', '1')
+    with self.assertRaisesRegex(RuntimeError, 'no reply for: new-agent$'):
+      agent.step('do something')
+
+  def test_batch_raises_on_failed_pending_call(self):
+    with mock.patch.dict(os.environ, {'MIDSCENE_RPC_BATCH': '1'}):
+      agent = midscene.MidsceneAgent(self.env)
+    self.enter_context(
+        mock.patch.object(
+            agent._session,
+            'post',
+            return_value=_create_response([
+                {'id': 1, 'error': {'message': 'no device'}},
+                {'id': 2, 'error': {'message': 'no agent'}},
+            ]),
+        )
+    )
+
+    agent.start_new_task('TestTask', '1')
+    with self.assertRaisesRegex(RuntimeError, 'new-agent'):
+      agent.step('do something')
+
+  def test_run_log_is_bounded(self):
+    with mock.patch.dict(os.environ, {'MIDSCENE_RUN_LOG_MAX': '2'}):
+      agent = midscene.MidsceneAgent(self.env)
+    agent.current_task_name = 'Task-1'
+    self.enter_context(
+        mock.patch.object(
+            agent._session,
+            'post',
+            return_value=_create_response(
+                {'result': {'code': 0, 'data': {'reason': 'failed'}}}
+            ),
+        )
+    )
+
+    for _ in range(3):
+      agent.step('do something')
+
+    self.assertLen(agent.run_log, 2)
+
+  @mock.patch.object(time, 'sleep')
+  def test_connection_errors_are_retried(self, mock_sleep):
+    agent = midscene.MidsceneAgent(self.env)
+    mock_post = self.enter_context(
+        mock.patch.object(agent._session, 'post', autospec=True)
+    )
+    mock_post.side_effect = [
+        requests.ConnectionError('reset'),
+        _create_response({}, status_code=503),
+        _create_response({'result': {}}),
+    ]
+
+    self.assertEqual(agent._send_rpc_request('new-agent', {}), {'result': {}})
+    self.assertEqual(mock_post.call_count, 3)
+    self.assertEqual(mock_sleep.call_count, 2)
+
+  @mock.patch.object(time, 'sleep')
+  def test_gives_up_after_all_retries(self, mock_sleep):
+    agent = midscene.MidsceneAgent(self.env)
+    mock_post = self.enter_context(
+        mock.patch.object(agent._session, 'post', autospec=True)
+    )
+    mock_post.side_effect = requests.ConnectTimeout('timed out')
+
+    with self.assertRaisesRegex(RuntimeError, 'Failed to send RPC request'):
+      agent._send_rpc_request('run-ai-method', {})
+    self.assertEqual(mock_post.call_count, 4)
+    self.assertEqual(mock_sleep.call_count, 3)
+
+  @mock.patch.object(time, 'sleep')
+  def test_read_timeout_is_not_retried_for_run_ai_method(self, mock_sleep):
+    agent = midscene.MidsceneAgent(self.env)
+    mock_post = self.enter_context(
+        mock.patch.object(agent._session, 'post', autospec=True)
+    )
+    mock_post.side_effect = requests.ReadTimeout('timed out')
+
+    with self.assertRaisesRegex(RuntimeError, 'Failed to send RPC request'):
+      agent._send_rpc_request('run-ai-method', {})
+    mock_post.assert_called_once()
+    mock_sleep.assert_not_called()
+
+  @mock.patch.object(time, 'sleep')
+  def test_refused_connection_is_retried_for_run_ai_method(self, mock_sleep):
+    agent = midscene.MidsceneAgent(self.env)
+    mock_post = self.enter_context(
+        mock.patch.object(agent._session, 'post', autospec=True)
+    )
+    refused = urllib3_exceptions.MaxRetryError(
+        None,
+        '/',
+        urllib3_exceptions.NewConnectionError(None, 'connection refused'),
+    )
+    mock_post.side_effect = [
+        requests.ConnectionError(refused),
+        _create_response({'result': {}}),
+    ]
+
+    self.assertEqual(
+        agent._send_rpc_request('run-ai-method', {}), {'result': {}}
+    )
+    self.assertEqual(mock_post.call_count, 2)
+    mock_sleep.assert_called_once()
+
+  def test_client_errors_are_not_retried(self):
+    agent = midscene.MidsceneAgent(self.env)
+    response = _create_response({}, status_code=400)
+    response.raise_for_status.side_effect = requests.HTTPError('bad request')
+    mock_post = self.enter_context(
+        mock.patch.object(
+            agent._session, 'post', autospec=True, return_value=response
+        )
+    )
+
+    with self.assertRaises(requests.HTTPError):
+      agent._send_rpc_request('new-agent', {})
+    mock_post.assert_called_once()
+
+  def test_step_agents_runs_each_agent(self):
+    agents = [midscene.MidsceneAgent(self.env) for _ in range(2)]
+    for i, agent in enumerate(agents):
+      agent.current_task_name = f'Task-{i}'
+      self.enter_context(
+          mock.patch.object(
+              agent._session,
+              'post',
+              return_value=_create_response(
+                  {'result': {'code': 1, 'data': f'done-{i}'}}
+              ),
+          )
+      )
+
+    results = asyncio.run(midscene.step_agents(agents, ['goal-0', 'goal-1']))
+
+    self.assertEqual(
+        [r.data['midscene_action_response'] for r in results],
+        ['done-0', 'done-1'],
+    )
+    self.assertEqual([a.step_count for a in agents], [1, 1])
+
+  def test_start_new_task_async(self):
+    agent = midscene.MidsceneAgent(self.env)
+    mock_post = self.enter_context(
+        mock.patch.object(
+            agent._session,
+            'post',
+            autospec=True,
+            return_value=_create_response({'result': {}}),
+        )
+    )
+
+    agent.start_new_task_async('TestTask', '1').result()
+
+    self.assertEqual(agent.current_task_name, 'Task-1-TestTask')
+    self.assertEqual(_sent_payloads(mock_post)[0]['method'], 'new-agent')
+    agent.close()
+
+  def test_close_closes_session(self):
+    agent = midscene.MidsceneAgent(self.env)
+    with mock.patch.object(agent._session, 'close') as mock_close:
+      agent.close()
+    mock_close.assert_called_once()
+
+
+if __name__ == '__main__':
+  absltest.main()
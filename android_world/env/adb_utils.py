@@ -14,9 +14,13 @@
 
 """Utilties to interact with the environment using adb."""
 
+import itertools
 import json
 import os
 import re
+import select
+import subprocess
+import threading
 import time
 from typing import Any, Callable, Collection, Iterable, Literal, Optional, TypeVar
 import unicodedata
@@ -548,6 +552,121 @@ def type_text(
       logging.error('Failed to type word: %r', formatted)
 
 
+class PersistentShell:
+  """Runs shell commands through one long-lived `adb shell` session.
+
+  Every `adb shell` invocation pays for a new adb connection and a new shell
+  process on the device. This keeps a single session open instead, and ends the
+  output of each command with a unique marker carrying its exit status. Each
+  command runs in a subshell so it cannot change the session's state, and with
+  stdin from /dev/null so it cannot consume the commands that follow it.
+
+  Commands are run one at a time; concurrent callers wait for each other.
+  """
+
+  def __init__(self, adb_path: str, device_name: str):
+    """Initializes the shell; the session is started on first use.
+
+    Args:
+      adb_path: The adb binary.
+      device_name: The serial of the device, e.g. "emulator-5554".
+    """
+    # -T: without a pty, output keeps its \n line endings and input is not
+    # echoed back, either of which would break finding the end marker.
+    self._command = [adb_path, '-s', device_name, 'shell', '-T']
+    self._process: Optional[subprocess.Popen[bytes]] = None
+    self._lock = threading.Lock()
+    self._marker_ids = itertools.count()
+
+  def run(
+      self, command: str, timeout_sec: Optional[float] = _DEFAULT_TIMEOUT_SECS
+  ) -> adb_pb2.AdbResponse:
+    """Runs a shell command.
+
+    Args:
+      command: The command, as it would be passed to `adb shell`.
+      timeout_sec: A timeout for this command. On timeout the session is closed
+        and a new one is started by the next command.
+
+    Returns:
+      A response like the one for a generic `adb shell` request: the combined
+      stdout and stderr, with an ADB_ERROR status if the command failed.
+    """
+    with self._lock:
+      if self._process is None or self._process.poll() is not None:
+        self._process = subprocess.Popen(
+            self._command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+        )
+      marker = f'___ANDROID_WORLD_END_{next(self._marker_ids)}___'
+      try:
+        self._process.stdin.write(
+            f"( {command}\n) < /dev/null 2>&1;"
+            f" printf '\\n%s %s\\n' {marker} $?\n"
+            .encode()
+        )
+        self._process.stdin.flush()
+      except OSError:
+        self._close_locked()
+        return adb_pb2.AdbResponse(status=adb_pb2.AdbResponse.Status.ADB_ERROR)
+      return self._read_response(b'\n' + marker.encode() + b' ', timeout_sec)
+
+  def _read_response(
+      self, end: bytes, timeout_sec: Optional[float]
+  ) -> adb_pb2.AdbResponse:
+    """Reads output until the end marker and its exit status."""
+    fd = self._process.stdout.fileno()
+    deadline = None if timeout_sec is None else time.monotonic() + timeout_sec
+    data = bytearray()
+    while True:
+      index = data.find(end)
+      if index != -1:
+        line_end = data.find(b'\n', index + len(end))
+        if line_end != -1:
+          exit_status = data[index + len(end) : line_end]
+          status = (
+              adb_pb2.AdbResponse.Status.OK
+              if exit_status == b'0'
+              else adb_pb2.AdbResponse.Status.ADB_ERROR
+          )
+          return adb_pb2.AdbResponse(
+              status=status,
+              generic=adb_pb2.AdbResponse.GenericResponse(
+                  output=bytes(data[:index])
+              ),
+          )
+      remaining = None if deadline is None else deadline - time.monotonic()
+      ready = remaining is None or remaining > 0
+      if ready:
+        ready, _, _ = select.select([fd], [], [], remaining)
+      if not ready:
+        logging.error('Persistent adb shell timed out; closing it.')
+        self._close_locked()
+        return adb_pb2.AdbResponse(status=adb_pb2.AdbResponse.Status.TIMEOUT)
+      chunk = os.read(fd, 65536)
+      if not chunk:
+        logging.error('Persistent adb shell exited unexpectedly.')
+        self._close_locked()
+        return adb_pb2.AdbResponse(status=adb_pb2.AdbResponse.Status.ADB_ERROR)
+      data += chunk
+
+  def close(self) -> None:
+    """Ends the session, if one is running."""
+    with self._lock:
+      self._close_locked()
+
+  def _close_locked(self) -> None:
+    if self._process is None:
+      return
+    self._process.kill()
+    self._process.wait()
+    self._process.stdin.close()
+    self._process.stdout.close()
+    self._process = None
+
+
 def issue_generic_request(
     args: Collection[str] | str,
     env: env_interface.AndroidEnvInterface,
@@ -577,6 +696,17 @@ def issue_generic_request(
   else:
     args_str = ' '.join(args)
 
+  persistent_shell = getattr(env, 'persistent_shell', None)
+  if (
+      isinstance(persistent_shell, PersistentShell)
+      and len(args) > 1
+      and args[0] == 'shell'
+  ):
+    response = persistent_shell.run(args_str[len('shell ') :], timeout_sec)
+    if response.status != adb_pb2.AdbResponse.Status.OK:
+      logging.error('Failed to issue generic adb request: %r', args_str)
+    return response
+
   response = env.execute_adb_call(
       adb_pb2.AdbRequest(
           generic=adb_pb2.AdbRequest.GenericRequest(args=args),
@@ -14,6 +14,9 @@
 
 """Tests for adb_utils."""
 
+import os
+import shutil
+import tempfile
 from unittest import mock
 
 from absl.testing import absltest
@@ -176,6 +179,70 @@ class AdbSettingsTest(AdbTestSetup):
       )
 
 
+class PersistentShellTest(absltest.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    # Stands in for adb: records its arguments and runs sh.
+    directory = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, directory)
+    self.args_file = os.path.join(directory, 'args')
+    fake_adb = os.path.join(directory, 'adb')
+    with open(fake_adb, 'w') as f:
+      f.write(f'#!/bin/sh\necho "$@" > {self.args_file}\nexec sh\n')
+    os.chmod(fake_adb, 0o755)
+    self.shell = adb_utils.PersistentShell(fake_adb, 'emulator-5554')
+    self.addCleanup(self.shell.close)
+
+  def test_session_has_no_pty(self):
+    self.shell.run('true')
+
+    with open(self.args_file) as f:
+      self.assertEqual(f.read(), '-s emulator-5554 shell -T\n')
+
+  def test_commands_do_not_read_session_input(self):
+    response = self.shell.run('cat')
+
+    self.assertEqual(response.status, adb_pb2.AdbResponse.Status.OK)
+    self.assertEqual(response.generic.output, b'')
+    self.assertEqual(self.shell.run('echo ok').generic.output, b'ok\n')
+
+  def test_runs_commands_in_one_session(self):
+    first = self.shell.run('echo $$')
+    second = self.shell.run('echo $$')
+
+    self.assertEqual(first.status, adb_pb2.AdbResponse.Status.OK)
+    self.assertEqual(first.generic.output, second.generic.output)
+
+  def test_output_is_preserved_exactly(self):
+    response = self.shell.run("printf 'a\\nb'; echo err >&2")
+
+    self.assertEqual(response.generic.output, b'a\nberr\n')
+
+  def test_failed_command(self):
+    response = self.shell.run('cd /nonexistent')
+
+    self.assertEqual(response.status, adb_pb2.AdbResponse.Status.ADB_ERROR)
+    self.assertEqual(
+        self.shell.run('true').status, adb_pb2.AdbResponse.Status.OK
+    )
+
+  def test_timeout_restarts_session(self):
+    response = self.shell.run('sleep 5', timeout_sec=0.2)
+
+    self.assertEqual(response.status, adb_pb2.AdbResponse.Status.TIMEOUT)
+    self.assertEqual(self.shell.run('echo ok').generic.output, b'ok\n')
+
+  def test_issue_generic_request_uses_shell(self):
+    env = mock.MagicMock()
+    env.persistent_shell = self.shell
+
+    response = adb_utils.issue_generic_request(['shell', 'echo', 'hi'], env)
+
+    self.assertEqual(response.generic.output, b'hi\n')
+    env.execute_adb_call.assert_not_called()
+
+
 class AdbTypingTest(AdbTestSetup):
 
   def test_can_type_text(self):
@@ -16,24 +16,30 @@
 
 import contextlib
 import enum
+import functools
 import os
 import subprocess
 import time
 from typing import Any
 from typing import cast
 from typing import Optional
+from typing import TYPE_CHECKING
 from absl import logging
 from android_env import env_interface
 from android_env import loader
 from android_env.components import config_classes
 from android_env.proto.a11y import android_accessibility_forest_pb2
-from android_env.wrappers import a11y_grpc_wrapper
 from android_env.wrappers import base_wrapper
 from android_world.env import adb_utils
 from android_world.env import representation_utils
 from android_world.utils import file_utils
 import dm_env
 
+if TYPE_CHECKING:
+  # Only imported where the gRPC wrapper is actually used, which keeps it and
+  # its gRPC servicer modules off the import path of the lighter helpers here.
+  from android_env.wrappers import a11y_grpc_wrapper
+
 
 def _has_wrapper(
     env: env_interface.AndroidEnvInterface,
@@ -60,13 +66,22 @@ def get_a11y_tree(
     env: env_interface.AndroidEnvInterface,
     max_retries: int = 10,
     sleep_duration: float = 2.0,
+    initial_delay: float = 0.05,
+    has_wrapper: Optional[bool] = None,
 ) -> android_accessibility_forest_pb2.AndroidAccessibilityForest:
   """Gets a11y tree.
 
   Args:
     env: AndroidEnv.
-    max_retries: Maximum number of retries to get a11y tree.
-    sleep_duration: Time to sleep between each retry in seconds.
+    max_retries: Number of `sleep_duration` intervals to keep retrying for. The
+      total time slept before giving up is `max_retries * sleep_duration`.
+    sleep_duration: Maximum time to sleep between each retry in seconds.
+    initial_delay: Time to sleep after the first failed attempt in seconds. The
+      delay doubles after each further attempt, up to `sleep_duration`. Pass
+      `sleep_duration` to retry at a fixed interval.
+    has_wrapper: Whether `env` is known to be wrapped with
+      a11y_grpc_wrapper.A11yGrpcWrapper. If None, the wrapper chain is walked
+      to find out.
 
   Returns:
     A11y tree.
@@ -74,11 +89,15 @@ def get_a11y_tree(
   Raises:
     RuntimeError: If the a11y tree was not able to be retrieved.
   """
-  if not _has_wrapper(env, a11y_grpc_wrapper.A11yGrpcWrapper):
+  if has_wrapper is None:
+    from android_env.wrappers import a11y_grpc_wrapper  # pylint: disable=g-import-not-at-top,redefined-outer-name
+
+    has_wrapper = _has_wrapper(env, a11y_grpc_wrapper.A11yGrpcWrapper)
+  if not has_wrapper:
     raise ValueError(
         'Must use a11y_grpc_wrapper.A11yGrpcWrapper to get the a11y tree.'
     )
-  env = cast(a11y_grpc_wrapper.A11yGrpcWrapper, env)
+  env = cast('a11y_grpc_wrapper.A11yGrpcWrapper', env)
   if adb_utils.retry(3)(adb_utils.check_airplane_mode)(env):
     logging.warning(
         'Airplane mode is on -- cannot retrieve a11y tree via gRPC. Turning'
@@ -88,20 +107,24 @@ def get_a11y_tree(
     env.attempt_enable_networking()
     time.sleep(1.0)
 
-  forest: Optional[
-      android_accessibility_forest_pb2.AndroidAccessibilityForest
-  ] = None
-  for _ in range(max_retries):
+  accumulate_new_extras = env.accumulate_new_extras  # pytype:disable=attribute-error
+  # Short delays make the first retries fast, but the total wait is kept the
+  # same as retrying at a fixed interval, since giving up forces a reconnect.
+  remaining = max_retries * sleep_duration
+  delay = initial_delay
+  while True:
     try:
-      forest = env.accumulate_new_extras()['accessibility_tree'][-1]  # pytype:disable=attribute-error
-      return forest
+      return accumulate_new_extras()['accessibility_tree'][-1]
     except KeyError:
       logging.warning('Could not get a11y tree, retrying.')
-    time.sleep(sleep_duration)
+    if remaining <= 0:
+      break
+    delay = min(delay, remaining)
+    time.sleep(delay)
+    remaining -= delay
+    delay = min(delay * 2, sleep_duration)
 
-  if forest is None:
-    raise RuntimeError('Could not get a11y tree.')
-  return forest
+  raise RuntimeError('Could not get a11y tree.')
 
 
 _TASK_PATH = file_utils.convert_to_posix_path(
@@ -138,8 +161,29 @@ class A11yMethod(enum.Enum):
   NONE = 'none'
 
 
-def _is_a11y_forwarder_installed(env: env_interface.AndroidEnvInterface) -> bool:
-  """Check if accessibility forwarder app is already installed."""
+# Devices on which the accessibility forwarder app is known to be installed.
+# Only positive results are recorded: the app is never uninstalled by us, but a
+# missing app gets installed right after the check.
+_A11Y_FORWARDER_INSTALLED: set[str] = set()
+
+
+def _is_a11y_forwarder_installed(
+    env: env_interface.AndroidEnvInterface,
+    device_serial: Optional[str] = None,
+) -> bool:
+  """Check if accessibility forwarder app is already installed.
+
+  Args:
+    env: The AndroidEnv to check.
+    device_serial: The adb serial of the device behind `env`. Results are only
+      remembered when it is known.
+
+  Returns:
+    Whether the app is installed.
+  """
+  if device_serial in _A11Y_FORWARDER_INSTALLED:
+    return True
+
   from android_env.proto import adb_pb2
 
   check_request = adb_pb2.AdbRequest(
@@ -153,15 +197,29 @@ def _is_a11y_forwarder_installed(env: env_interface.AndroidEnvInterface) -> bool
     output = response.generic.output.decode('utf-8', errors='ignore')
     if 'com.google.androidenv.accessibilityforwarder' in output:
       logging.info('Accessibility forwarder app is already installed.')
+      if device_serial is not None:
+        _A11Y_FORWARDER_INSTALLED.add(device_serial)
       return True
   return False
 
 
+# (device name, port) pairs that already have an `adb reverse` set up by this
+# process, so that repeated controller creation does not spawn adb again.
+_REVERSED_PORTS: set[tuple[str, int]] = set()
+
+
 def apply_a11y_forwarder_app_wrapper(
-    env: env_interface.AndroidEnvInterface, install_a11y_forwarding_app: bool
+    env: env_interface.AndroidEnvInterface,
+    install_a11y_forwarding_app: bool,
+    device_serial: Optional[str] = None,
 ) -> env_interface.AndroidEnvInterface:
+  from android_env.wrappers import a11y_grpc_wrapper  # pylint: disable=g-import-not-at-top,redefined-outer-name
+
   # Check if already installed to avoid redundant download
-  should_install = install_a11y_forwarding_app and not _is_a11y_forwarder_installed(env)
+  should_install = (
+      install_a11y_forwarding_app
+      and not _is_a11y_forwarder_installed(env, device_serial)
+  )
   if install_a11y_forwarding_app and not should_install:
     logging.info('Skipping accessibility forwarder installation (already installed).')
 
@@ -190,11 +248,14 @@ def apply_a11y_forwarder_app_wrapper(
         a11y_port, device_name,
     )
     try:
-      subprocess.run(
-          [adb_path, '-s', device_name,
-           'reverse', f'tcp:{a11y_port}', f'tcp:{a11y_port}'],
-          capture_output=True, text=True, timeout=10,
-      )
+      if (device_name, a11y_port) not in _REVERSED_PORTS:
+        reverse_result = subprocess.run(
+            [adb_path, '-s', device_name,
+             'reverse', f'tcp:{a11y_port}', f'tcp:{a11y_port}'],
+            capture_output=True, text=True, timeout=10,
+        )
+        if reverse_result.returncode == 0:
+          _REVERSED_PORTS.add((device_name, a11y_port))
       # Tell the Forwarder App to connect to localhost instead of 10.0.2.2
       # so that traffic goes through the adb reverse tunnel back to host A.
       subprocess.run(
@@ -234,16 +295,52 @@ class AndroidWorldController(base_wrapper.BaseWrapper):
       env: env_interface.AndroidEnvInterface,
       a11y_method: A11yMethod = A11yMethod.A11Y_FORWARDER_APP,
       install_a11y_forwarding_app: bool = True,
+      console_port: Optional[int] = None,
+      adb_path: Optional[str] = None,
+      grpc_port: Optional[int] = None,
   ):
+    """Initializes the controller.
+
+    Args:
+      env: The AndroidEnv to control.
+      a11y_method: The method used to get the a11y tree.
+      install_a11y_forwarding_app: Whether to install the a11y forwarder app if
+        it is missing.
+      console_port: The emulator console port `env` was created with.
+      adb_path: The adb binary `env` was created with.
+      grpc_port: The emulator gRPC port `env` was created with.
+    """
     self._original_env = env
+    # Used by refresh_env to reconnect. If unset, they are read back from the
+    # env's emulator config instead.
+    self._console_port = console_port
+    self._adb_path = adb_path
+    self._grpc_port = grpc_port
     if a11y_method == A11yMethod.A11Y_FORWARDER_APP:
       self._env = apply_a11y_forwarder_app_wrapper(
-          env, install_a11y_forwarding_app
+          env,
+          install_a11y_forwarding_app,
+          device_serial=_get_device_serial(console_port),
       )
       self._env.reset()  # Initializes required server services in a11y wrapper.
     else:
       self._env = env
     self._a11y_method = a11y_method
+    # Known up front when we applied the wrapper ourselves, which saves walking
+    # the wrapper chain on every a11y tree fetch. None means "walk to find out".
+    self._has_a11y_grpc_wrapper: Optional[bool] = (
+        True if a11y_method == A11yMethod.A11Y_FORWARDER_APP else None
+    )
+    # Last forest converted to UI elements and the result, so the same forest
+    # is not walked twice. The forest itself is kept (rather than its id) so
+    # that a new forest can never be mistaken for it.
+    self._cached_forest: Optional[
+        android_accessibility_forest_pb2.AndroidAccessibilityForest
+    ] = None
+    self._cached_ui_elements: list[representation_utils.UIElement] = []
+    # When set, adb_utils.issue_generic_request sends shell commands through
+    # this session instead of starting a new `adb shell` for each one.
+    self.persistent_shell = _create_persistent_shell(console_port, adb_path)
 
   @property
   def device_screen_size(self) -> tuple[int, int]:
@@ -264,23 +361,45 @@ class AndroidWorldController(base_wrapper.BaseWrapper):
     return self._env
 
   def refresh_env(self):
-    # pylint: disable=protected-access
-    # pytype: disable=attribute-error
     # Reconnect to emulator and reload a11y wrapper in case we lose connection.
+    # A lost connection may also have dropped the adb reverse tunnels.
+    _REVERSED_PORTS.clear()
+    if self._console_port is None:
+      # pylint: disable=protected-access
+      # pytype: disable=attribute-error
+      config = self.env._coordinator._simulator._config
+      # pylint: enable=protected-access
+      # pytype: enable=attribute-error
+      self._console_port = config.emulator_launcher.emulator_console_port
+      self._adb_path = config.adb_controller.adb_path
+      self._grpc_port = config.emulator_launcher.grpc_port
     self._env = get_controller(
-        console_port=self.env._coordinator._simulator._config.emulator_launcher.emulator_console_port,
-        adb_path=self.env._coordinator._simulator._config.adb_controller.adb_path,
-        grpc_port=self.env._coordinator._simulator._config.emulator_launcher.grpc_port,
+        console_port=self._console_port,
+        adb_path=self._adb_path,
+        grpc_port=self._grpc_port,
     ).env
-    # pylint: enable=protected-access
-    # pytype: enable=attribute-error
+    self._cached_forest = None
+    self._cached_ui_elements = []
+    if self.persistent_shell is not None:
+      # Started again on next use, against the new connection.
+      self.persistent_shell.close()
+
+  def close(self) -> None:
+    if self.persistent_shell is not None:
+      self.persistent_shell.close()
+    super().close()
 
   def _get_a11y_forest(
       self,
       max_retries: int = 5,
       sleep_duration: float = 1.0,
   ) -> android_accessibility_forest_pb2.AndroidAccessibilityForest:
-    return get_a11y_tree(self._env, max_retries=max_retries, sleep_duration=sleep_duration)
+    return get_a11y_tree(
+        self._env,
+        max_retries=max_retries,
+        sleep_duration=sleep_duration,
+        has_wrapper=self._has_a11y_grpc_wrapper,
+    )
 
   def get_a11y_forest(
       self,
@@ -297,13 +416,23 @@ class AndroidWorldController(base_wrapper.BaseWrapper):
       time.sleep(3.0)  # Give a11y service time to initialize after reconnect.
       return self._get_a11y_forest(max_retries=10, sleep_duration=2.0)
 
+  def _forest_to_ui_elements(
+      self,
+      forest: android_accessibility_forest_pb2.AndroidAccessibilityForest,
+  ) -> list[representation_utils.UIElement]:
+    """Converts a forest to UI elements, reusing the last conversion."""
+    if forest is not self._cached_forest:
+      self._cached_ui_elements = representation_utils.forest_to_ui_elements(
+          forest,
+          exclude_invisible_elements=True,
+      )
+      self._cached_forest = forest
+    return self._cached_ui_elements
+
   def get_ui_elements(self) -> list[representation_utils.UIElement]:
     """Returns the most recent UI elements from the device."""
     if self._a11y_method == A11yMethod.A11Y_FORWARDER_APP:
-      return representation_utils.forest_to_ui_elements(
-          self.get_a11y_forest(),
-          exclude_invisible_elements=True,
-      )
+      return self._forest_to_ui_elements(self.get_a11y_forest())
     elif self._a11y_method == A11yMethod.UIAUTOMATOR:
       return representation_utils.xml_dump_to_ui_elements(
           adb_utils.uiautomator_dump(self._env)
@@ -315,10 +444,7 @@ class AndroidWorldController(base_wrapper.BaseWrapper):
     """Adds a11y tree info to the observation."""
     if self._a11y_method == A11yMethod.A11Y_FORWARDER_APP:
       forest = self.get_a11y_forest()
-      ui_elements = representation_utils.forest_to_ui_elements(
-          forest,
-          exclude_invisible_elements=True,
-      )
+      ui_elements = self._forest_to_ui_elements(forest)
     else:
       forest = None
       ui_elements = self.get_ui_elements()
@@ -364,24 +490,37 @@ class AndroidWorldController(base_wrapper.BaseWrapper):
     )
 
 
-def _write_default_task_proto() -> str:
-  with open(_TASK_PATH, 'w') as f:
-    f.write("""\
+_DEFAULT_TASK_PROTO = """\
 id: "default"
 
 name: "Default task for device control."
 description: "Empty task"
 
 max_episode_sec: 7200  # Prevent infinite episodes.
-  """)
+  """
+
+
+def _write_default_task_proto() -> str:
+  """Writes the default task proto, unless it is already on disk."""
+  if os.path.exists(_TASK_PATH):
+    with open(_TASK_PATH, 'r') as f:
+      if f.read() == _DEFAULT_TASK_PROTO:
+        return _TASK_PATH
+  with open(_TASK_PATH, 'w') as f:
+    f.write(_DEFAULT_TASK_PROTO)
   return _TASK_PATH
 
 
+# The connection settings are fixed for the lifetime of the process, but are
+# only read on first use so that values loaded from a .env file after import
+# are still picked up.
+@functools.cache
 def _is_remote_mode() -> bool:
   """Check if running in remote/Docker mode."""
   return os.getenv("ANDROID_CONNECTION_TYPE") == "Remote"
 
 
+@functools.cache
 def _get_remote_device_name() -> str:
   """Get device name for remote mode (host:port format)."""
   host = os.getenv("ANDROID_REMOTE_HOST", "localhost")
@@ -389,6 +528,27 @@ def _get_remote_device_name() -> str:
   return f"{host}:{port}"
 
 
+def _get_device_serial(console_port: Optional[int]) -> Optional[str]:
+  """Returns the adb serial of the device, or None if it is not known."""
+  if _is_remote_mode():
+    return _get_remote_device_name()
+  if console_port is not None:
+    return f"emulator-{console_port}"
+  return None
+
+
+def _create_persistent_shell(
+    console_port: Optional[int], adb_path: Optional[str]
+) -> Optional[adb_utils.PersistentShell]:
+  """Returns a persistent adb shell if ANDROID_WORLD_PERSISTENT_SHELL=1."""
+  if os.getenv("ANDROID_WORLD_PERSISTENT_SHELL") != "1" or adb_path is None:
+    return None
+  device_serial = _get_device_serial(console_port)
+  if device_serial is None:
+    return None
+  return adb_utils.PersistentShell(os.path.expanduser(adb_path), device_serial)
+
+
 def _adb_connect_remote(adb_path: str, device_name: str) -> bool:
   """Connect to remote ADB device.
 
@@ -429,6 +589,19 @@ def _adb_connect_remote(adb_path: str, device_name: str) -> bool:
     return False
 
 
+@functools.lru_cache(maxsize=4)
+def _parse_task_proto(path: str, mtime: float) -> Any:
+  """Parses a textproto task file; cached per path and modification time."""
+  del mtime  # Only part of the cache key.
+  from android_env.proto import task_pb2
+  from google.protobuf import text_format
+
+  task = task_pb2.Task()
+  with open(path, 'r') as proto_file:
+    text_format.Parse(proto_file.read(), task)
+  return task
+
+
 def _load_android_env(config: config_classes.AndroidEnvConfig):
   """Custom loader that supports remote mode.
 
@@ -440,13 +613,13 @@ def _load_android_env(config: config_classes.AndroidEnvConfig):
   from android_env.components import task_manager as task_manager_lib
   from android_env.proto import task_pb2
   from android_world.env.android_world_emulator_simulator import AndroidWorldEmulatorSimulator
-  from google.protobuf import text_format
 
   # Load task
   task = task_pb2.Task()
   if isinstance(config.task, config_classes.FilesystemTaskConfig):
-    with open(config.task.path, 'r') as proto_file:
-      text_format.Parse(proto_file.read(), task)
+    path = config.task.path
+    # Copy so that the cached proto is never shared between environments.
+    task.CopyFrom(_parse_task_proto(path, os.path.getmtime(path)))
 
   task_manager = task_manager_lib.TaskManager(task)
 
@@ -512,5 +685,8 @@ def get_controller(
 
   logging.info('Setting up AndroidWorldController.')
   return AndroidWorldController(
-      android_env_instance
+      android_env_instance,
+      console_port=console_port,
+      adb_path=adb_path,
+      grpc_port=grpc_port,
   )
@@ -13,7 +13,10 @@
 # limitations under the License.
 
 import os
+import shutil
+import subprocess
 import tempfile
+import time
 from unittest import mock
 
 from absl.testing import absltest
@@ -130,7 +133,31 @@ class AndroidWorldControllerTest(absltest.TestCase):
         exclude_invisible_elements=True,
     )
 
-  @mock.patch.object(adb_utils, 'check_airplane_mode')
+  @mock.patch.object(android_world_controller, 'get_a11y_tree')
+  @mock.patch.object(representation_utils, 'forest_to_ui_elements')
+  def test_ui_elements_reused_for_same_forest(
+      self, mock_forest_to_ui, mock_get_a11y_tree
+  ):
+    mock_base_env = mock.Mock(spec=env_interface.AndroidEnvInterface)
+    env = android_world_controller.AndroidWorldController(mock_base_env)
+    forest, new_forest = mock.Mock(), mock.Mock()
+    mock_get_a11y_tree.side_effect = [forest, forest, new_forest]
+    timestep = dm_env.TimeStep(
+        observation={}, reward=None, discount=None, step_type=None
+    )
+
+    env._process_timestep(timestep)
+    env.get_ui_elements()
+    self.assertEqual(mock_forest_to_ui.call_count, 1)
+
+    env.get_ui_elements()
+    self.assertEqual(mock_forest_to_ui.call_count, 2)
+    mock_forest_to_ui.assert_called_with(
+        new_forest, exclude_invisible_elements=True
+    )
+
+  @mock.patch.object(time, 'sleep')
+  @mock.patch.object(adb_utils, 'check_airplane_mode', return_value=False)
   @mock.patch.object(android_world_controller, 'get_controller')
   @mock.patch.object(android_world_controller, '_has_wrapper')
   @mock.patch.object(
@@ -142,24 +169,201 @@ class AndroidWorldControllerTest(absltest.TestCase):
       mock_has_wrapper,
       mock_get_controller,
       mock_check_airplane_mode,
+      mock_sleep,
   ):
     del mock_has_wrapper, mock_get_controller, mock_check_airplane_mode
     mock_base_env = mock.Mock(spec=env_interface.AndroidEnvInterface)
     env = android_world_controller.AndroidWorldController(mock_base_env)
     unused_mock_check_airplane_mode = False
-    env._env.accumulate_new_extras.side_effect = [
-        {},
-        {},
+    env._env.accumulate_new_extras.side_effect = lambda: (
+        {'accessibility_tree': ['success']} if mock_refresh_env.called else {}
+    )
+
+    forest = env.get_a11y_forest()
+
+    self.assertEqual(forest, 'success')
+    mock_refresh_env.assert_called_once()
+    # The default budget of 5 x 1s is spent polling before reconnecting, and
+    # then 3s is given to the a11y service after reconnecting.
+    self.assertAlmostEqual(
+        sum(c.args[0] for c in mock_sleep.call_args_list), 5.0 + 3.0
+    )
+
+  @mock.patch.object(time, 'sleep')
+  @mock.patch.object(adb_utils, 'check_airplane_mode', return_value=False)
+  @mock.patch.object(android_world_controller, '_has_wrapper', return_value=True)
+  def test_get_a11y_tree_backs_off_exponentially(
+      self, mock_has_wrapper, mock_check_airplane_mode, mock_sleep
+  ):
+    del mock_has_wrapper, mock_check_airplane_mode
+    mock_env = mock.Mock()
+    mock_env.accumulate_new_extras.side_effect = [
         {},
         {},
         {},
         {'accessibility_tree': ['success']},
     ]
 
-    forest = env.get_a11y_forest()
+    forest = android_world_controller.get_a11y_tree(
+        mock_env, sleep_duration=0.15
+    )
 
     self.assertEqual(forest, 'success')
-    mock_refresh_env.assert_called_once()
+    self.assertEqual(
+        [c.args[0] for c in mock_sleep.call_args_list], [0.05, 0.1, 0.15]
+    )
+
+  @mock.patch.object(time, 'sleep')
+  @mock.patch.object(adb_utils, 'check_airplane_mode', return_value=False)
+  @mock.patch.object(android_world_controller, '_has_wrapper', return_value=True)
+  def test_get_a11y_tree_raises_after_max_retries(
+      self, mock_has_wrapper, mock_check_airplane_mode, mock_sleep
+  ):
+    del mock_has_wrapper, mock_check_airplane_mode
+    mock_env = mock.Mock()
+    mock_env.accumulate_new_extras.return_value = {}
+
+    with self.assertRaises(RuntimeError):
+      android_world_controller.get_a11y_tree(
+          mock_env, max_retries=3, sleep_duration=1.0
+      )
+
+    sleeps = [c.args[0] for c in mock_sleep.call_args_list]
+    self.assertEqual(sleeps[:3], [0.05, 0.1, 0.2])
+    self.assertLessEqual(max(sleeps), 1.0)
+    self.assertAlmostEqual(sum(sleeps), 3.0)
+    self.assertEqual(
+        mock_env.accumulate_new_extras.call_count, len(sleeps) + 1
+    )
+
+  @mock.patch.object(adb_utils, 'check_airplane_mode', return_value=False)
+  @mock.patch.object(android_world_controller, '_has_wrapper')
+  def test_get_a11y_tree_skips_wrapper_check_when_known(
+      self, mock_has_wrapper, mock_check_airplane_mode
+  ):
+    del mock_check_airplane_mode
+    mock_env = mock.Mock()
+    mock_env.accumulate_new_extras.return_value = {
+        'accessibility_tree': ['success']
+    }
+
+    forest = android_world_controller.get_a11y_tree(mock_env, has_wrapper=True)
+
+    self.assertEqual(forest, 'success')
+    mock_has_wrapper.assert_not_called()
+
+  @mock.patch.object(subprocess, 'run')
+  @mock.patch.object(android_world_controller, '_is_remote_mode')
+  def test_adb_reverse_only_set_up_once_per_port(
+      self, mock_is_remote_mode, mock_run
+  ):
+    mock_is_remote_mode.return_value = True
+    mock_run.return_value = subprocess.CompletedProcess(args=[], returncode=0)
+    self.mock_a11y_wrapper.return_value.get_port.return_value = 1234
+    self.enter_context(
+        mock.patch.object(android_world_controller, '_REVERSED_PORTS', set())
+    )
+    mock_env = mock.Mock(spec=env_interface.AndroidEnvInterface)
+
+    android_world_controller.apply_a11y_forwarder_app_wrapper(mock_env, False)
+    android_world_controller.apply_a11y_forwarder_app_wrapper(mock_env, False)
+
+    adb_subcommands = [c.args[0][3] for c in mock_run.call_args_list]
+    self.assertEqual(adb_subcommands, ['reverse', 'shell', 'shell'])
+
+  def test_a11y_forwarder_installed_check_is_cached(self):
+    self.enter_context(
+        mock.patch.object(
+            android_world_controller, '_A11Y_FORWARDER_INSTALLED', set()
+        )
+    )
+    mock_env = mock.Mock(spec=env_interface.AndroidEnvInterface)
+    mock_env.execute_adb_call.return_value = (
+        fake_adb_responses.create_successful_generic_response(
+            'package:com.google.androidenv.accessibilityforwarder'
+        )
+    )
+
+    self.assertTrue(
+        android_world_controller._is_a11y_forwarder_installed(
+            mock_env, 'emulator-5554'
+        )
+    )
+    self.assertTrue(
+        android_world_controller._is_a11y_forwarder_installed(
+            mock_env, 'emulator-5554'
+        )
+    )
+    mock_env.execute_adb_call.assert_called_once()
+
+    # Another device, or one whose serial is unknown, is checked again.
+    android_world_controller._is_a11y_forwarder_installed(
+        mock_env, 'emulator-5556'
+    )
+    android_world_controller._is_a11y_forwarder_installed(mock_env)
+    android_world_controller._is_a11y_forwarder_installed(mock_env)
+    self.assertEqual(mock_env.execute_adb_call.call_count, 4)
+
+  @mock.patch.object(
+      android_world_controller, '_is_a11y_forwarder_installed'
+  )
+  def test_a11y_forwarder_check_uses_device_serial(self, mock_is_installed):
+    mock_is_installed.return_value = True
+    mock_base_env = mock.Mock(spec=env_interface.AndroidEnvInterface)
+
+    android_world_controller.AndroidWorldController(
+        mock_base_env, console_port=5556
+    )
+
+    mock_is_installed.assert_called_once_with(mock_base_env, 'emulator-5556')
+
+  @mock.patch.object(android_world_controller, 'get_controller')
+  def test_refresh_env_reuses_connection_args(self, mock_get_controller):
+    mock_base_env = mock.Mock(spec=env_interface.AndroidEnvInterface)
+    env = android_world_controller.AndroidWorldController(
+        mock_base_env, console_port=5556, adb_path='adb', grpc_port=8556
+    )
+
+    env.refresh_env()
+
+    mock_get_controller.assert_called_once_with(
+        console_port=5556, adb_path='adb', grpc_port=8556
+    )
+    self.assertEqual(env.env, mock_get_controller.return_value.env)
+
+  @mock.patch.object(adb_utils, 'PersistentShell', autospec=True)
+  def test_persistent_shell_is_opt_in(self, mock_persistent_shell):
+    mock_base_env = mock.Mock(spec=env_interface.AndroidEnvInterface)
+
+    env = android_world_controller.AndroidWorldController(
+        mock_base_env, console_port=5556, adb_path='adb'
+    )
+
+    self.assertIsNone(env.persistent_shell)
+    mock_persistent_shell.assert_not_called()
+
+  @mock.patch.dict(os.environ, {'ANDROID_WORLD_PERSISTENT_SHELL': '1'})
+  @mock.patch.object(android_world_controller, 'get_controller')
+  @mock.patch.object(adb_utils, 'PersistentShell', autospec=True)
+  def test_persistent_shell_lifecycle(
+      self, mock_persistent_shell, mock_get_controller
+  ):
+    mock_base_env = mock.Mock(spec=env_interface.AndroidEnvInterface)
+
+    env = android_world_controller.AndroidWorldController(
+        mock_base_env, console_port=5556, adb_path='~/adb'
+    )
+
+    mock_persistent_shell.assert_called_once_with(
+        os.path.expanduser('~/adb'), 'emulator-5556'
+    )
+    shell = mock_persistent_shell.return_value
+    self.assertIs(env.persistent_shell, shell)
+    env.refresh_env()
+    shell.close.assert_called_once()
+    env.close()
+    self.assertEqual(shell.close.call_count, 2)
+    mock_get_controller.return_value.env.close.assert_called_once()
 
   def test_pull_file(self):
     file_contents = 'test file contents'
@@ -191,5 +395,38 @@ class AndroidWorldControllerTest(absltest.TestCase):
     self.assertEqual(open(remote_file_path, 'r').read(), new_file_contents)
 
 
+class TaskProtoTest(absltest.TestCase):
+
+  def test_write_default_task_proto_skips_unchanged_file(self):
+    directory = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, directory)
+    task_path = file_utils.convert_to_posix_path(directory, 'default.textproto')
+    self.enter_context(
+        mock.patch.object(android_world_controller, '_TASK_PATH', task_path)
+    )
+
+    android_world_controller._write_default_task_proto()
+    mtime = os.path.getmtime(task_path)
+    os.utime(task_path, (mtime - 100, mtime - 100))
+    android_world_controller._write_default_task_proto()
+
+    self.assertEqual(os.path.getmtime(task_path), mtime - 100)
+    with open(task_path) as f:
+      self.assertEqual(f.read(), android_world_controller._DEFAULT_TASK_PROTO)
+
+  def test_parse_task_proto_is_cached(self):
+    task_path = create_file_with_contents(
+        android_world_controller._DEFAULT_TASK_PROTO
+    )
+    mtime = os.path.getmtime(task_path)
+
+    task = android_world_controller._parse_task_proto(task_path, mtime)
+
+    self.assertEqual(task.id, 'default')
+    self.assertIs(
+        android_world_controller._parse_task_proto(task_path, mtime), task
+    )
+
+
 if __name__ == '__main__':
   absltest.main()
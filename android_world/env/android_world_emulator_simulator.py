@@ -14,16 +14,21 @@
 
 """Extended EmulatorSimulator for android_world project."""
 
+import functools
 import os
 
 from android_env.components.simulators.emulator import emulator_simulator
 
 
+# Cached like the helpers in android_world_controller, since adb_device_name is
+# consulted on every ADB interaction.
+@functools.cache
 def _is_remote_mode() -> bool:
   """Check if running in remote/Docker mode."""
   return os.getenv("ANDROID_CONNECTION_TYPE") == "Remote"
 
 
+@functools.cache
 def _get_remote_device_name() -> str:
   """Get device name for remote mode (host:port format)."""
   host = os.getenv("ANDROID_REMOTE_HOST", "localhost")
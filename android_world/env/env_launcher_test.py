@@ -56,7 +56,12 @@ class EnvLauncherTest(absltest.TestCase):
             ),
         )
     )
-    mock_controller.assert_called_with(mock_android_env)
+    mock_controller.assert_called_with(
+        mock_android_env,
+        console_port=5556,
+        adb_path="some_adb_path",
+        grpc_port=8554,
+    )
     mock_async_android_env.assert_called_with(mock_controller.return_value)
 
 
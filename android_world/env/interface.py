@@ -214,6 +214,8 @@ class AsyncAndroidEnv(AsyncEnv):
   """Async environment interface using AndroidEnv to communicate with device."""
 
   interaction_cache = ''
+  storage_clean = False
+  skip_next_storage_clear = False
 
   def __init__(
       self, controller: android_world_controller.AndroidWorldController
@@ -225,6 +227,12 @@ class AsyncAndroidEnv(AsyncEnv):
     # use this to save the agent response. Or later on when agent has the
     # ability to ask user question, user's answer will be saved here as well.
     self.interaction_cache = ''
+    # Whether commonly used storage locations have been cleared since the last
+    # task ran. See user_data_generation.clear_device_storage.
+    self.storage_clean = False
+    # Whether the task being initialized may skip clearing storage, because the
+    # previous task's tear down left it clean. Set by TaskEval.initialize_task.
+    self.skip_next_storage_clear = False
 
   @property
   def controller(self) -> android_world_controller.AndroidWorldController:
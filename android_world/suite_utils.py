@@ -252,6 +252,9 @@ def _run_task(
     interaction_results = run_episode(task)
     task_successful = task.is_successful(env)
   except Exception as e:  # pylint: disable=broad-exception-caught
+    # tear_down is skipped, so storage may still hold this task's files.
+    env.storage_clean = False
+    env.skip_next_storage_clear = False
     _log_and_print('%s\nSKIPPING %s.', '~' * 80, task.name)
     logging.exception(
         'Logging exception and skipping task. Will keep running. Task: %s: %s',
@@ -14,6 +14,8 @@
 
 """Logic for checking file changes using `adb shell`."""
 
+import hashlib
+import shlex
 from typing import Any
 from absl import logging
 from android_world.env import adb_utils
@@ -24,6 +26,19 @@ from android_world.utils import file_utils
 from android_world.utils import fuzzy_match_lib
 
 
+# Printed by the device instead of the file contents when they hash to the
+# expected text.
+_DIGEST_MATCH_MARKER = "___ANDROID_WORLD_DIGEST_MATCH___"
+
+
+def _run_setup_script(commands: list[str], env: interface.AsyncEnv) -> str:
+  """Runs shell commands in a single adb call and returns the stripped output."""
+  res = adb_utils.issue_generic_request(
+      ["shell", "; ".join(commands)], env.controller
+  )
+  return res.generic.output.decode().strip()
+
+
 class MoveFile(task_eval.TaskEval):
   """For checking that a file has been moved."""
 
@@ -49,57 +64,88 @@ class MoveFile(task_eval.TaskEval):
     self.dest_directory = file_utils.convert_to_posix_path(
         data_directory, self.params["destination_folder"]
     )
+    self._src_path = file_utils.convert_to_posix_path(
+        self.source_directory, self.params["file_name"]
+    )
+    self._dest_path = file_utils.convert_to_posix_path(
+        self.dest_directory, self.params["file_name"]
+    )
+    # The destination is only checked when the file left the source folder,
+    # since the task has already failed otherwise.
+    self._check_args = [
+        "shell",
+        f"if {file_utils.exists_condition(self._src_path)}; then echo SRC;"
+        f" elif {file_utils.exists_condition(self._dest_path)}; then"
+        " echo DEST; else echo NONE; fi",
+    ]
 
   def initialize_task(self, env: interface.AsyncEnv) -> None:
     """Creates the file in the source folder, ensuring it exists before the move operation."""
     super().initialize_task(env)
     user_data_generation.clear_device_storage(env)
-    user_data_generation.generate_noise_files(
-        self.params["file_name"],
-        self.source_directory,
-        env.controller,
-        self.params["noise_candidates"],
-    )
-    file_utils.create_file(
-        self.params["file_name"], self.source_directory, env.controller
-    )
-    file_utils.mkdir(self.dest_directory, env.controller)
 
-    if not file_utils.check_file_or_folder_exists(
-        self.params["file_name"], self.source_directory, env.controller
-    ):
+    # Set up and verify the folders in one adb call.
+    status = _run_setup_script(
+        [
+            "mkdir -p"
+            f" {shlex.quote(self.source_directory)}"
+            f" {shlex.quote(self.dest_directory)}",
+            *user_data_generation.generate_noise_files_script(
+                self.params["file_name"],
+                self.source_directory,
+                self.params["noise_candidates"],
+            ),
+            file_utils.create_file_command(
+                self.params["file_name"], self.source_directory
+            ),
+            f"if ! {file_utils.exists_condition(self._src_path)}; then"
+            " echo MISSING;"
+            f" elif {file_utils.exists_condition(self._dest_path)}; then"
+            " echo EXISTS;"
+            " else echo OK; fi",
+        ],
+        env,
+    )
+    if status == "MISSING":
       raise RuntimeError("File was not created in the source folder.")
-    if file_utils.check_file_or_folder_exists(
-        self.params["file_name"], self.dest_directory, env.controller
-    ):
+    if status == "EXISTS":
       raise RuntimeError(
           "Something went wrong. File somehow already exists in the destination"
           " folder."
       )
+    if status != "OK":
+      raise RuntimeError(f"Failed to set up the source folder: {status!r}")
 
   def tear_down(self, env: interface.AsyncEnv):
     super().tear_down(env)
-    user_data_generation.clear_device_storage(env)
+    user_data_generation.clear_device_storage(env, mark_clean=True)
 
   def is_successful(self, env: interface.AsyncEnv) -> float:
     """Check if the file has been moved successfully."""
     super().is_successful(env)
-    src_exists = file_utils.check_file_or_folder_exists(
-        self.params["file_name"], self.source_directory, env.controller
-    )
-    dest_exists = file_utils.check_file_or_folder_exists(
-        self.params["file_name"], self.dest_directory, env.controller
-    )
-    succeeded = not src_exists and dest_exists
+    res = adb_utils.issue_generic_request(self._check_args, env.controller)
+    adb_utils.check_ok(res, "Failed to check the moved file.")
+    status = res.generic.output.decode().strip()
+    if status not in ("SRC", "DEST", "NONE"):
+      raise RuntimeError(f"Unexpected output checking moved file: {status!r}")
+    src_exists = status == "SRC"
+    dest_exists = "skipped" if src_exists else status == "DEST"
+    succeeded = status == "DEST"
 
     # Collect validation logs
     self.add_validation_log('MoveFile Evaluation Details:')
-    self.add_validation_log(f'  - File name: {self.params["file_name"]}')
-    self.add_validation_log(f'  - Source directory: {self.source_directory}')
-    self.add_validation_log(f'  - Destination directory: {self.dest_directory}')
-    self.add_validation_log(f'  - File exists in source: {src_exists} (expected: False)')
-    self.add_validation_log(f'  - File exists in destination: {dest_exists} (expected: True)')
-    self.add_validation_log(f'  - Validation result: {succeeded}')
+    self.add_validation_log('  - File name: %s', self.params["file_name"])
+    self.add_validation_log('  - Source directory: %s', self.source_directory)
+    self.add_validation_log(
+        '  - Destination directory: %s', self.dest_directory
+    )
+    self.add_validation_log(
+        '  - File exists in source: %s (expected: False)', src_exists
+    )
+    self.add_validation_log(
+        '  - File exists in destination: %s (expected: True)', dest_exists
+    )
+    self.add_validation_log('  - Validation result: %s', succeeded)
 
     return 1.0 if succeeded else 0.0
 
@@ -137,42 +183,53 @@ class DeleteFile(task_eval.TaskEval):
       )
     else:
       self.data_directory = data_directory
+    self._file_path = file_utils.convert_to_posix_path(
+        self.data_directory, self.params["file_name"]
+    )
 
   def initialize_task(self, env: interface.AsyncEnv) -> None:
     """Creates file that should be deleted, along with random files."""
     super().initialize_task(env)
     user_data_generation.clear_device_storage(env)
 
-    file_utils.create_file(
-        self.params["file_name"], self.data_directory, env.controller
-    )
-    user_data_generation.generate_noise_files(
-        self.params["file_name"],
-        self.data_directory,
-        env.controller,
-        self.params["noise_candidates"],
+    # Set up and verify the folder in one adb call.
+    status = _run_setup_script(
+        [
+            f"mkdir -p {shlex.quote(self.data_directory)}",
+            file_utils.create_file_command(
+                self.params["file_name"], self.data_directory
+            ),
+            *user_data_generation.generate_noise_files_script(
+                self.params["file_name"],
+                self.data_directory,
+                self.params["noise_candidates"],
+            ),
+            f"if {file_utils.exists_condition(self._file_path)}; then"
+            " echo OK; fi",
+        ],
+        env,
     )
-    if not file_utils.check_file_or_folder_exists(
-        self.params["file_name"], self.data_directory, env.controller
-    ):
+    if status != "OK":
       raise RuntimeError("Something went wrong, file was not created.")
 
   def tear_down(self, env: interface.AsyncEnv) -> None:
     super().tear_down(env)
-    user_data_generation.clear_device_storage(env)
+    user_data_generation.clear_device_storage(env, mark_clean=True)
 
   def is_successful(self, env: interface.AsyncEnv) -> float:
     super().is_successful(env)
-    exists = file_utils.check_file_or_folder_exists(
-        self.params["file_name"], self.data_directory, env.controller
+    [exists] = file_utils.check_files_or_folders_exist(
+        [self._file_path], env.controller
     )
 
     # Collect validation logs
     self.add_validation_log('DeleteFile Evaluation Details:')
-    self.add_validation_log(f'  - File name: {self.params["file_name"]}')
-    self.add_validation_log(f'  - Directory: {self.data_directory}')
-    self.add_validation_log(f'  - File still exists: {exists} (expected: False)')
-    self.add_validation_log(f'  - Validation result: {not exists}')
+    self.add_validation_log('  - File name: %s', self.params["file_name"])
+    self.add_validation_log('  - Directory: %s', self.data_directory)
+    self.add_validation_log(
+        '  - File still exists: %s (expected: False)', exists
+    )
+    self.add_validation_log('  - Validation result: %s', not exists)
 
     return 0.0 if exists else 1.0
 
@@ -205,6 +262,20 @@ class CreateFile(task_eval.TaskEval):
     """
     super().__init__(params)
     self.data_directory = data_directory
+    self._file_path = file_utils.convert_to_posix_path(
+        self.data_directory, self.params["file_name"]
+    )
+    # Digests of the expected text, with and without the trailing newline that
+    # `echo` adds, so an exact match can be confirmed on device.
+    self._expected_digests = ()
+    self._expected_norm = None
+    if "text" in self.params:
+      text = self.params["text"].encode()
+      self._expected_digests = (
+          hashlib.sha256(text).hexdigest(),
+          hashlib.sha256(text + b"\n").hexdigest(),
+      )
+      self._expected_norm = fuzzy_match_lib.normalize(self.params["text"])
 
   def initialize_task(self, env: interface.AsyncEnv) -> None:
     super().initialize_task(env)
@@ -212,47 +283,61 @@ class CreateFile(task_eval.TaskEval):
 
   def tear_down(self, env: interface.AsyncEnv) -> None:
     super().tear_down(env)
-    user_data_generation.clear_device_storage(env)
+    user_data_generation.clear_device_storage(env, mark_clean=True)
 
   def is_successful(self, env: interface.AsyncEnv) -> float:
     super().is_successful(env)
     file_name = self.params["file_name"]
 
-    exists = file_utils.check_file_or_folder_exists(
-        file_name, self.data_directory, env.controller
+    [exists] = file_utils.check_files_or_folders_exist(
+        [self._file_path], env.controller
     )
 
     if not exists:
       # Collect validation logs
       self.add_validation_log('CreateFile Evaluation Details:')
-      self.add_validation_log(f'  - File name: {file_name}')
-      self.add_validation_log(f'  - Directory: {self.data_directory}')
-      self.add_validation_log(f'  - File exists: {exists}')
-      self.add_validation_log(f'  - Validation result: False (file not found)')
+      self.add_validation_log('  - File name: %s', file_name)
+      self.add_validation_log('  - Directory: %s', self.data_directory)
+      self.add_validation_log('  - File exists: %s', exists)
+      self.add_validation_log('  - Validation result: False (file not found)')
       return 0.0
 
-    # Check the contents of the new file
-    res = adb_utils.issue_generic_request(
-        [
-            "shell",
-            "cat",
-            file_utils.convert_to_posix_path(self.data_directory, file_name),
-        ],
-        env.controller,
-    )
-    file_contents = res.generic.output.decode().replace("\r", "").strip()
-    match = fuzzy_match_lib.fuzzy_match(file_contents, self.params["text"])
+    # Check the contents of the new file. The device compares its sha256 with
+    # the expected text and only sends the contents back when they differ.
+    path = shlex.quote(self._file_path)
+    script = f"cat {path}"
+    if self._expected_digests:
+      digest_patterns = "|".join(f"{d}*" for d in self._expected_digests)
+      script = (
+          f'case "$(sha256sum {path})" in {digest_patterns})'
+          f" echo {_DIGEST_MATCH_MARKER};; *) {script};; esac"
+      )
+    res = adb_utils.issue_generic_request(["shell", script], env.controller)
+    expected = self.params.get("text")
+    if (
+        self._expected_digests
+        and res.generic.output.strip() == _DIGEST_MATCH_MARKER.encode()
+    ):
+      file_contents = expected.strip()
+      match = True
+    else:
+      file_contents = (
+          res.generic.output.translate(None, b"\r").strip().decode()
+      )
+      match = fuzzy_match_lib.fuzzy_match_prenormalized(
+          file_contents, self._expected_norm
+      )
 
     # Collect validation logs
     self.add_validation_log('CreateFile Evaluation Details:')
-    self.add_validation_log(f'  - File exists: {exists}')
-    self.add_validation_log(f'  - Content match: {match}')
-    self.add_validation_log(f'  - Expected: {repr(self.params["text"])}')
-    self.add_validation_log(f'  - Actual:   {repr(file_contents)}')
-    self.add_validation_log(f'  - Validation result: {match}')
+    self.add_validation_log('  - File exists: %s', exists)
+    self.add_validation_log('  - Content match: %s', match)
+    self.add_validation_log('  - Expected: %r', expected)
+    self.add_validation_log('  - Actual:   %r', file_contents)
+    self.add_validation_log('  - Validation result: %s', match)
 
     if not match:
-      logging.info("%s does not match %s", file_contents, self.params["text"])
+      logging.info("%s does not match %s", file_contents, expected)
       return 0.0
 
     return 1.0
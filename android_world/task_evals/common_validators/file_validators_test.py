@@ -14,6 +14,11 @@
 
 """Tests for base evaluators."""
 
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
 from unittest import mock
 from absl.testing import absltest
 from android_env.proto import adb_pb2
@@ -47,6 +52,42 @@ class TestCreateFile(test_utils.AdbEvalTestBase):
     task = file_validators.CreateFile(self.params, "/mock/data/path")
     self.assertEqual(test_utils.perform_task(task, env.base_env), 1.0)
 
+  def test_is_successful_digest_match(self):
+    self.mock_check_file_or_folder_exists.return_value = True
+    mock_response = adb_pb2.AdbResponse()
+    mock_response.generic.output = (
+        file_validators._DIGEST_MATCH_MARKER.encode() + b"\r\n"
+    )
+    self.mock_issue_generic_request.return_value = mock_response
+    env = mock.MagicMock()
+
+    task = file_validators.CreateFile(self.params, "/mock/data/path")
+    self.assertEqual(test_utils.perform_task(task, env.base_env), 1.0)
+
+    script = next(
+        call.args[0][1]
+        for call in self.mock_issue_generic_request.call_args_list
+        if isinstance(call.args[0], list) and "sha256sum" in call.args[0][1]
+    )
+    self.assertIn(hashlib.sha256(b"Hello World\n").hexdigest(), script)
+    self.assertIn("cat /mock/data/path/my_note.md", script)
+
+  def test_is_successful_without_expected_text(self):
+    self.mock_check_file_or_folder_exists.return_value = True
+    mock_response = adb_pb2.AdbResponse()
+    mock_response.generic.output = b"Hello World"
+    self.mock_issue_generic_request.return_value = mock_response
+    env = mock.MagicMock()
+
+    task = file_validators.CreateFile(
+        {"file_name": "my_note.md"}, "/mock/data/path"
+    )
+    self.assertEqual(test_utils.perform_task(task, env.base_env), 0.0)
+
+    self.mock_issue_generic_request.assert_any_call(
+        ["shell", "cat /mock/data/path/my_note.md"], env.base_env.controller
+    )
+
   def test_initialize_task_wrong_name(self):
     self.mock_issue_generic_request.response = (
         b"This is some other World. Not the same world."
@@ -62,17 +103,32 @@ class TestCreateFile(test_utils.AdbEvalTestBase):
     self.assertFalse(test_utils.perform_task(task, env.base_env))
 
 
+def _create_setup_script_response(status: str) -> adb_pb2.AdbResponse:
+  response = adb_pb2.AdbResponse()
+  response.generic.output = f"{status}\r\n".encode()
+  return response
+
+
+def _get_setup_script(mock_issue_generic_request: mock.MagicMock) -> str:
+  for call in mock_issue_generic_request.call_args_list:
+    args = call.args[0]
+    if isinstance(args, list) and args[1].startswith("mkdir -p"):
+      return args[1]
+  raise AssertionError("No setup script was issued.")
+
+
 class TestDeleteFile(test_utils.AdbEvalTestBase):
 
+  def setUp(self):
+    super().setUp()
+    self.mock_issue_generic_request.return_value = (
+        _create_setup_script_response("OK")
+    )
+
   def test_is_successful(
       self,
   ):
-    response_ls_deleted = adb_pb2.AdbResponse()
-    response_ls_deleted.generic.output = b"another_note.md\n"
-    self.mock_check_file_or_folder_exists.side_effect = [
-        True,  # File exists.
-        False,  # File doesn't exist.
-    ]
+    self.mock_check_file_or_folder_exists.return_value = False
     env = mock.MagicMock()
     params = {
         "file_name": "test_note.md",
@@ -82,17 +138,15 @@ class TestDeleteFile(test_utils.AdbEvalTestBase):
     task = file_validators.DeleteFile(params, "/mock/data/path")
 
     self.assertEqual(test_utils.perform_task(task, env.base_env), 1.0)
-    self.mock_create_file.assert_called()
-    self.mock_create_random_files.assert_called()
+    script = _get_setup_script(self.mock_issue_generic_request)
+    self.assertIn("> /mock/data/path/test_note.md", script)
+    self.assertIn(
+        "if ls -1a /mock/data/path 2>/dev/null | grep -Fxq -- test_note.md;",
+        script,
+    )
 
   def test_is_successful_subfolder(self):
-    # Create mock adb response for 'ls' command when note is deleted
-    mock_response_ls_deleted = adb_pb2.AdbResponse()
-    mock_response_ls_deleted.generic.output = b"another_note.md\n"
-    self.mock_check_file_or_folder_exists.side_effect = [
-        True,  # File exists.
-        False,  # File doesn't exist.
-    ]
+    self.mock_check_file_or_folder_exists.return_value = False
     env = mock.MagicMock()
     params = {
         "file_name": "test_note.md",
@@ -103,19 +157,11 @@ class TestDeleteFile(test_utils.AdbEvalTestBase):
     task = file_validators.DeleteFile(params, "/mock/data/path")
 
     self.assertEqual(test_utils.perform_task(task, env.base_env), 1.0)
-    self.mock_create_file.assert_called()
-    self.mock_create_random_files.assert_called()
+    script = _get_setup_script(self.mock_issue_generic_request)
+    self.assertIn("mkdir -p /mock/data/path/a_folder", script)
 
   def test_is_not_successful(self):
-    # Create mock adb response for 'ls' command when note still exists
-    mock_response_ls_still_exists = adb_pb2.AdbResponse()
-    mock_response_ls_still_exists.generic.output = (
-        b"test_note.md\nanother_note.md\n"
-    )
-    self.mock_check_file_or_folder_exists.side_effect = [
-        True,  # File exists.
-        True,  # File still exists.
-    ]
+    self.mock_check_file_or_folder_exists.return_value = True
     env = mock.MagicMock()
     params = {
         "file_name": "test_note.md",
@@ -125,8 +171,21 @@ class TestDeleteFile(test_utils.AdbEvalTestBase):
     task = file_validators.DeleteFile(params, "/mock/data/path")
 
     self.assertFalse(test_utils.perform_task(task, env.base_env))
-    self.mock_create_file.assert_called()
-    self.mock_create_random_files.assert_called()
+
+  def test_initialize_task_file_not_created(self):
+    self.mock_issue_generic_request.return_value = (
+        _create_setup_script_response("")
+    )
+    env = mock.MagicMock()
+    params = {
+        "file_name": "test_note.md",
+        "noise_candidates": ["Noise Candidate"],
+    }
+
+    task = file_validators.DeleteFile(params, "/mock/data/path")
+
+    with self.assertRaises(RuntimeError):
+      task.initialize_task(env.base_env)
 
 
 class TestMoveFile(test_utils.AdbEvalTestBase):
@@ -139,53 +198,87 @@ class TestMoveFile(test_utils.AdbEvalTestBase):
         "destination_folder": "Destination",
         "noise_candidates": ["Noise Candidate"],
     }
+    self.check_status = "DEST"
+    self.mock_issue_generic_request.side_effect = self._issue_generic_request
+
+  def _issue_generic_request(self, args, *unused_args, **unused_kwargs):
+    if isinstance(args, list) and args[1].startswith("if ls "):
+      response = _create_setup_script_response(self.check_status)
+      response.status = adb_pb2.AdbResponse.Status.OK
+      return response
+    return _create_setup_script_response("OK")
+
+  def _get_check_script(self) -> str:
+    for call in self.mock_issue_generic_request.call_args_list:
+      args = call.args[0]
+      if isinstance(args, list) and args[1].startswith("if ls "):
+        return args[1]
+    raise AssertionError("No check script was issued.")
 
   def test_is_successful(self):
-    # Create mock adb response for 'ls' command when note is deleted
-    mock_response_ls_deleted = adb_pb2.AdbResponse()
-    mock_response_ls_deleted.generic.output = b"another_note.md\n"
-
-    self.mock_check_file_or_folder_exists.side_effect = [
-        True,  # Source file exists.
-        False,  # Destination file does not exist.
-        False,  # Source file does not exist.
-        True,  # Destination file exists.
-    ]
-    test_utils.log_mock_calls(self.mock_check_file_or_folder_exists)
-
     env = mock.MagicMock()
 
     task = file_validators.MoveFile(self.params, "/mock/data/path")
     self.assertEqual(test_utils.perform_task(task, env.base_env), 1.0)
 
-    # Assert that the mock functions were called
-    self.mock_create_file.assert_called()
-    self.mock_mkdir.assert_called()
-    self.mock_create_random_files.assert_called()
+    self.assertEqual(
+        self._get_check_script(),
+        "if ls -1a /mock/data/path/Source 2>/dev/null"
+        " | grep -Fxq -- test_file.md; then echo SRC;"
+        " elif ls -1a /mock/data/path/Destination 2>/dev/null"
+        " | grep -Fxq -- test_file.md; then echo DEST; else echo NONE; fi",
+    )
+    script = _get_setup_script(self.mock_issue_generic_request)
+    self.assertIn(
+        "mkdir -p /mock/data/path/Source /mock/data/path/Destination", script
+    )
+    self.assertIn("> /mock/data/path/Source/test_file.md", script)
 
   def test_is_not_successful(self):
-    # Create mock adb response for 'ls' command when note still exists
-    mock_response_ls_still_exists = adb_pb2.AdbResponse()
-    mock_response_ls_still_exists.generic.output = (
-        b"test_note.md\nanother_note.md\n"
-    )
+    self.check_status = "SRC"  # Source file still exists.
 
-    self.mock_check_file_or_folder_exists.side_effect = [
-        True,  # Source file exists.
-        False,  # Destination file does not exist.
-        True,  # Source file still exists.
-        False,  # Destination file still does not exist.
-    ]
+    env = mock.MagicMock()
+
+    task = file_validators.MoveFile(self.params, "/mock/data/path")
+    self.assertFalse(test_utils.perform_task(task, env.base_env))
+
+  def test_is_not_successful_file_missing(self):
+    self.check_status = "NONE"  # File is in neither folder.
 
     env = mock.MagicMock()
 
     task = file_validators.MoveFile(self.params, "/mock/data/path")
     self.assertFalse(test_utils.perform_task(task, env.base_env))
 
-    # Assert that the mock functions were called
-    self.mock_create_file.assert_called()
-    self.mock_create_random_files.assert_called()
-    self.mock_mkdir.assert_called()
+  def test_check_script_matches_exact_name(self):
+    data_directory = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, data_directory)
+    os.mkdir(os.path.join(data_directory, "Source"))
+    os.mkdir(os.path.join(data_directory, "Destination"))
+    wrong_case = os.path.join(data_directory, "Destination", "Test_File.md")
+    with open(wrong_case, "w") as f:
+      f.write("")
+
+    task = file_validators.MoveFile(self.params, data_directory)
+    check = lambda: subprocess.run(
+        ["sh", "-c", task._check_args[1]], capture_output=True, check=True
+    ).stdout.strip()
+
+    self.assertEqual(check(), b"NONE")
+    with open(task._dest_path, "w") as f:
+      f.write("")
+    self.assertEqual(check(), b"DEST")
+
+  def test_initialize_task_file_already_in_destination(self):
+    self.mock_issue_generic_request.side_effect = None
+    self.mock_issue_generic_request.return_value = (
+        _create_setup_script_response("EXISTS")
+    )
+    env = mock.MagicMock()
+
+    task = file_validators.MoveFile(self.params, "/mock/data/path")
+    with self.assertRaisesRegex(RuntimeError, "destination"):
+      task.initialize_task(env.base_env)
 
 
 if __name__ == "__main__":
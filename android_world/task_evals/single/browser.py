@@ -87,7 +87,7 @@ class BrowserTask(task_eval.TaskEval):
 
   def tear_down(self, env: interface.AsyncEnv):
     super().tear_down(env)
-    user_data_generation.clear_device_storage(env)
+    user_data_generation.clear_device_storage(env, mark_clean=True)
     adb_utils.clear_app_data(
         adb_utils.extract_package_name(adb_utils.get_adb_activity('chrome')),
         env.controller,
@@ -14,6 +14,7 @@
 
 """Tasks for the camera app."""
 
+import functools
 from typing import Any
 
 from absl import logging
@@ -24,23 +25,75 @@ from android_world.task_evals import task_eval
 from android_world.utils import file_utils
 
 
+@functools.cache
+def _find_new_files_args(directory: str, marker_path: str) -> tuple[str, ...]:
+  """Returns adb args that list files in directory newer than marker_path."""
+  return (
+      "shell",
+      "find",
+      directory,
+      "-maxdepth",
+      "1",
+      "-type",
+      "f",
+      "!",
+      "-name",
+      "'.*'",
+      "-newer",
+      marker_path,
+  )
+
+
 class _Camera(task_eval.TaskEval):
   """Base class for Camera tasks."""
 
   app_names = ("camera",)
 
-  def _clear_app_data(self, env: interface.AsyncEnv) -> None:
-    """Clears the app data."""
-    file_utils.clear_directory(device_constants.PHOTOS_DATA, env.controller)
-    file_utils.clear_directory(device_constants.VIDEOS_DATA, env.controller)
+  @property
+  def _marker_path(self) -> str:
+    """Path of a file whose mtime marks the start of the task."""
+    return f"/data/local/tmp/android_world_marker_{self.name}"
+
+  def _clear_app_data(self, env: interface.AsyncEnv, *then: str) -> None:
+    """Clears the app data.
+
+    Args:
+      env: The environment.
+      *then: Optional shell command to run in the same adb call, once the app
+        data has been cleared.
+    """
+    file_utils.clear_directories(
+        [device_constants.PHOTOS_DATA, device_constants.VIDEOS_DATA],
+        env.controller,
+        then=then,
+    )
+
+  def _get_new_files(
+      self, directory: str, env: interface.AsyncEnv
+  ) -> list[str]:
+    """Returns the files in directory modified after the task started.
+
+    Only new files are transferred, instead of listing the directory before
+    and after the task and diffing the two listings.
+
+    Args:
+      directory: The directory to look in.
+      env: The environment.
+    """
+    contents = adb_utils.issue_generic_request(
+        _find_new_files_args(directory, self._marker_path), env.controller
+    )
+    return [
+        line.decode() for line in contents.generic.output.splitlines() if line
+    ]
 
   def initialize_task(self, env: interface.AsyncEnv) -> None:
     super().initialize_task(env)
-    self._clear_app_data(env)
+    self._clear_app_data(env, "touch", self._marker_path)
 
   def tear_down(self, env: interface.AsyncEnv):
     super().tear_down(env)
-    self._clear_app_data(env)
+    self._clear_app_data(env, "rm", "-f", self._marker_path)
 
 
 class CameraTakeVideo(_Camera):
@@ -54,43 +107,17 @@ class CameraTakeVideo(_Camera):
   }
   template = "Take one video."
 
-  def initialize_task(self, env: interface.AsyncEnv) -> None:
-    super().initialize_task(env)
-    contents = adb_utils.issue_generic_request(
-        ["shell", "ls", device_constants.VIDEOS_DATA],
-        env.controller,
-    )
-    logging.info("before_videos: %s", contents.generic.output.decode())
-    self.before_videos = set(
-        contents.generic.output.decode().replace("\r", "").split("\n")
-    )
-    logging.info("num before_videos: %s", self.before_videos)
-
   def is_successful(self, env: interface.AsyncEnv) -> float:
     super().is_successful(env)
-    contents = adb_utils.issue_generic_request(
-        ["shell", "ls", device_constants.VIDEOS_DATA],
-        env.controller,
-    )
-    logging.info("before_videos: %s", contents.generic.output.decode())
-    after_videos = set(
-        contents.generic.output.decode().replace("\r", "").split("\n")
-    )
-    logging.info("num after_videos: %s", after_videos)
-    new_videos = after_videos - self.before_videos
-    logging.info(
-        "number of after_videos - number of before_videos: %s",
-        len(new_videos),
-    )
+    new_videos = self._get_new_files(device_constants.VIDEOS_DATA, env)
+    logging.info("new_videos: %s", new_videos)
     success = len(new_videos) == 1
 
     # Collect validation logs
     self.add_validation_log('CameraTakeVideo Evaluation Details:')
-    self.add_validation_log(f'  - Videos before: {len(self.before_videos)}')
-    self.add_validation_log(f'  - Videos after: {len(after_videos)}')
-    self.add_validation_log(f'  - New videos: {new_videos}')
-    self.add_validation_log(f'  - Expected new videos: 1')
-    self.add_validation_log(f'  - Validation result: {success}')
+    self.add_validation_log('  - New videos: %s', new_videos)
+    self.add_validation_log('  - Expected new videos: 1')
+    self.add_validation_log('  - Validation result: %s', success)
 
     return 1.0 if success else 0.0
 
@@ -110,41 +137,17 @@ class CameraTakePhoto(_Camera):
   }
   template = "Take one photo."
 
-  def initialize_task(self, env: interface.AsyncEnv) -> None:
-    super().initialize_task(env)
-    contents = adb_utils.issue_generic_request(
-        ["shell", "ls", device_constants.PHOTOS_DATA], env.controller
-    )
-    logging.info("before_photos: %s", contents.generic.output.decode())
-    self.before_photos = set(
-        contents.generic.output.decode().replace("\r", "").split("\n")
-    )
-    logging.info("num before_photos: %s", self.before_photos)
-
   def is_successful(self, env: interface.AsyncEnv) -> float:
     super().is_successful(env)
-    contents = adb_utils.issue_generic_request(
-        ["shell", "ls", device_constants.PHOTOS_DATA], env.controller
-    )
-    logging.info("after_photos: %s", contents.generic.output.decode())
-    after_photos = set(
-        contents.generic.output.decode().replace("\r", "").split("\n")
-    )
-    logging.info("num after_photos: %s", after_photos)
-    new_photos = after_photos - self.before_photos
-    logging.info(
-        "number of after_photos - number of before_photos: %s",
-        len(new_photos),
-    )
+    new_photos = self._get_new_files(device_constants.PHOTOS_DATA, env)
+    logging.info("new_photos: %s", new_photos)
     success = len(new_photos) == 1
 
     # Collect validation logs
     self.add_validation_log('CameraTakePhoto Evaluation Details:')
-    self.add_validation_log(f'  - Photos before: {len(self.before_photos)}')
-    self.add_validation_log(f'  - Photos after: {len(after_photos)}')
-    self.add_validation_log(f'  - New photos: {new_photos}')
-    self.add_validation_log(f'  - Expected new photos: 1')
-    self.add_validation_log(f'  - Validation result: {success}')
+    self.add_validation_log('  - New photos: %s', new_photos)
+    self.add_validation_log('  - Expected new photos: 1')
+    self.add_validation_log('  - Validation result: %s', success)
 
     return 1.0 if success else 0.0
 
@@ -0,0 +1,114 @@
+# Copyright 2025 The android_world Authors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Tests for camera.py."""
+
+from unittest import mock
+
+from absl.testing import absltest
+from absl.testing import parameterized
+from android_env.proto import adb_pb2
+from android_world.task_evals.single import camera
+from android_world.utils import test_utils
+
+
+def _create_response(output: str = "") -> adb_pb2.AdbResponse:
+  response = adb_pb2.AdbResponse(status=adb_pb2.AdbResponse.Status.OK)
+  response.generic.output = output.encode()
+  return response
+
+
+class CameraTest(test_utils.AdbEvalTestBase, parameterized.TestCase):
+
+  def setUp(self):
+    super().setUp()
+    self.find_output = ""
+    self.mock_issue_generic_request.side_effect = self._issue_generic_request
+
+  def _issue_generic_request(self, args, *unused_args, **unused_kwargs):
+    if args[1] == "find":
+      return _create_response(self.find_output)
+    return _create_response()
+
+  def _get_calls(self) -> list[list[str]]:
+    return [
+        list(c.args[0]) for c in self.mock_issue_generic_request.call_args_list
+    ]
+
+  @parameterized.named_parameters(
+      ("video", camera.CameraTakeVideo, "/sdcard/Movies"),
+      ("photo", camera.CameraTakePhoto, "/sdcard/Pictures"),
+  )
+  def test_find_args(self, task_class, directory):
+    env = mock.MagicMock()
+    task = task_class({})
+    marker = f"/data/local/tmp/android_world_marker_{task_class.__name__}"
+
+    test_utils.perform_task(task, env)
+
+    self.assertIn(
+        [
+            "shell",
+            "find",
+            directory,
+            "-maxdepth",
+            "1",
+            "-type",
+            "f",
+            "!",
+            "-name",
+            "'.*'",
+            "-newer",
+            marker,
+        ],
+        self._get_calls(),
+    )
+
+  @parameterized.named_parameters(
+      ("none", "", 0.0),
+      ("one", "/sdcard/Pictures/IMG_1.jpg\r\n", 1.0),
+      (
+          "several",
+          "/sdcard/Pictures/IMG_1.jpg\r\n/sdcard/Pictures/IMG_2.jpg\r\n",
+          0.0,
+      ),
+  )
+  def test_is_successful(self, find_output, expected):
+    self.find_output = find_output
+    env = mock.MagicMock()
+
+    for task_class in (camera.CameraTakePhoto, camera.CameraTakeVideo):
+      with self.subTest(task_class.__name__):
+        self.assertEqual(
+            test_utils.perform_task(task_class({}), env), expected
+        )
+
+  def test_marker_is_touched_on_init_and_removed_on_tear_down(self):
+    env = mock.MagicMock()
+    task = camera.CameraTakePhoto({})
+    marker = "/data/local/tmp/android_world_marker_CameraTakePhoto"
+    clear = ["shell", "rm", "-rf", "/sdcard/Pictures/*", "/sdcard/Movies/*"]
+
+    task.initialize_task(env)
+    self.assertEqual(self._get_calls(), [clear + ["&&", "touch", marker]])
+
+    self.mock_issue_generic_request.reset_mock()
+    task.tear_down(env)
+    self.assertEqual(
+        self._get_calls(), [clear + ["&&", "rm", "-f", marker]]
+    )
+
+
+if __name__ == "__main__":
+  absltest.main()
@@ -392,7 +392,7 @@ class ExpenseAddMultipleFromGallery(_ExpenseAddMultiple):
 
   def tear_down(self, env: interface.AsyncEnv):
     super().tear_down(env)
-    user_data_generation.clear_device_storage(env)
+    user_data_generation.clear_device_storage(env, mark_clean=True)
 
 
 #### Generate expense data for tasks. ##########################################
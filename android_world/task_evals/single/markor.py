@@ -757,16 +757,17 @@ class MarkorChangeNoteContent(Markor):
 
   def is_successful(self, env: interface.AsyncEnv) -> float:
     super().is_successful(env)
-    original_exists = file_utils.check_file_or_folder_exists(
-        self.params["original_name"],
-        device_constants.MARKOR_DATA,
-        env.controller,
-    )
-    new_exists = file_utils.check_file_or_folder_exists(
-        self.params["new_name"],
-        device_constants.MARKOR_DATA,
-        env.controller,
-    )
+    with file_utils.StatCache():
+      original_exists = file_utils.check_file_or_folder_exists(
+          self.params["original_name"],
+          device_constants.MARKOR_DATA,
+          env.controller,
+      )
+      new_exists = file_utils.check_file_or_folder_exists(
+          self.params["new_name"],
+          device_constants.MARKOR_DATA,
+          env.controller,
+      )
     content_updated = False
     actual_content = None
     if new_exists:
@@ -861,16 +862,17 @@ class MarkorAddNoteHeader(Markor):
 
   def is_successful(self, env: interface.AsyncEnv) -> float:
     super().is_successful(env)
-    original_exists = file_utils.check_file_or_folder_exists(
-        self.params["original_name"],
-        device_constants.MARKOR_DATA,
-        env.controller,
-    )
-    new_exists = file_utils.check_file_or_folder_exists(
-        self.params["new_name"],
-        device_constants.MARKOR_DATA,
-        env.controller,
-    )
+    with file_utils.StatCache():
+      original_exists = file_utils.check_file_or_folder_exists(
+          self.params["original_name"],
+          device_constants.MARKOR_DATA,
+          env.controller,
+      )
+      new_exists = file_utils.check_file_or_folder_exists(
+          self.params["new_name"],
+          device_constants.MARKOR_DATA,
+          env.controller,
+      )
     expected_content = self.params["header"] + "\n\n" + self.params["original_content"] + "\n"
     correct = False
     actual_content = None
@@ -540,7 +540,7 @@ class RecipeAddMultipleRecipesFromImage(_RecipeAddMultipleRecipes):
 
   def tear_down(self, env: interface.AsyncEnv):
     super().tear_down(env)
-    user_data_generation.clear_device_storage(env)
+    user_data_generation.clear_device_storage(env, mark_clean=True)
 
 #### Utility functions used for generating recipes #############################
 
@@ -54,7 +54,7 @@ class SaveCopyOfReceiptTaskEval(task_eval.TaskEval):
 
   def tear_down(self, env: interface.AsyncEnv):
     super().tear_down(env)
-    user_data_generation.clear_device_storage(env)
+    user_data_generation.clear_device_storage(env, mark_clean=True)
 
   def is_successful(self, env: interface.AsyncEnv) -> float:
     super().is_successful(env)
@@ -30,6 +30,18 @@ from android_world.utils import app_snapshot
 from android_world.utils import datetime_utils
 
 
+def _print_validation_logs_enabled() -> bool:
+  """Whether validation logs are printed; set ANDROID_WORLD_VERBOSE_EVAL=0 to disable."""
+  return os.environ.get('ANDROID_WORLD_VERBOSE_EVAL') != '0'
+
+
+def _validation_logs_enabled() -> bool:
+  """Whether validation logs are collected, for printing or VALIDATION_LOG_FILE."""
+  return _print_validation_logs_enabled() or bool(
+      os.environ.get('VALIDATION_LOG_FILE')
+  )
+
+
 class TaskEval(abc.ABC):
   """Interface for a task and its evaluation.
 
@@ -46,16 +58,26 @@ class TaskEval(abc.ABC):
 
   def __init__(self, params: dict[str, Any]):
     self.initialized = False
-    self._validation_logs: list[str] = []
+    self._validation_logs: list[tuple[str, tuple[Any, ...]]] = []
 
     # Disabling this check for now as it is causing issues on occasion with a
     # with a RefResolutionError due to inability to resolve json-schema.org.
     # jsonschema.validate(params, self.schema)
     self._params = params
 
-  def add_validation_log(self, message: str) -> None:
-    """Add a validation log message to be printed at task end."""
-    self._validation_logs.append(message)
+  def add_validation_log(self, message: str, *args: Any) -> None:
+    """Add a validation log message to be printed at task end.
+
+    Like `logging`, `message` is only %-formatted with `args` when the logs are
+    printed, and nothing is collected when validation logs are disabled.
+
+    Args:
+      message: The message, optionally with %-style placeholders.
+      *args: Values for the placeholders in `message`.
+    """
+    if not _validation_logs_enabled():
+      return
+    self._validation_logs.append((message, args))
 
   def clear_validation_logs(self) -> None:
     """Clear all collected validation logs."""
@@ -66,20 +88,29 @@ class TaskEval(abc.ABC):
     if not self._validation_logs:
       return
     try:
-      print('\n====================== Task Result Validation ======================')
-      print(f'Task ID: {self.id}')
-      print(f'Task Name: {self.name}')
-      print('--------------------------------------------------------------------')
-      for log in self._validation_logs:
-        print(log)
-      print('====================== Task Result Validation ======================\n')
-      self._write_validation_logs_to_file()
-    except Exception as e:
-      print(f'[Warning] Failed to print validation logs: {e}')
+      # A message that fails to format is a bug in the task, so let it raise.
+      logs = self._formatted_validation_logs()
+      if _print_validation_logs_enabled():
+        print('\n====================== Task Result Validation ======================')
+        print(f'Task ID: {self.id}')
+        print(f'Task Name: {self.name}')
+        print('--------------------------------------------------------------------')
+        for log in logs:
+          print(log)
+        print('====================== Task Result Validation ======================\n')
+      self._write_validation_logs_to_file(logs)
+    except OSError as e:
+      logging.warning('Failed to print validation logs: %s', e)
     finally:
       self.clear_validation_logs()
 
-  def _write_validation_logs_to_file(self) -> None:
+  def _formatted_validation_logs(self) -> list[str]:
+    return [
+        message % args if args else message
+        for message, args in self._validation_logs
+    ]
+
+  def _write_validation_logs_to_file(self, logs: list[str]) -> None:
     """Write validation logs as JSON to a file specified by VALIDATION_LOG_FILE env var."""
     log_file = os.environ.get('VALIDATION_LOG_FILE')
     if not log_file:
@@ -88,7 +119,7 @@ class TaskEval(abc.ABC):
       entry = {
           'task_id': self.id,
           'task_name': self.name,
-          'logs': self._validation_logs,
+          'logs': logs,
       }
       # Append JSON entry to the file, one JSON object per line (JSONL format)
       with open(log_file, 'a', encoding='utf-8') as f:
@@ -97,8 +128,8 @@ class TaskEval(abc.ABC):
           f.write(json.dumps(entry, ensure_ascii=False) + '\n')
         finally:
           fcntl.flock(f, fcntl.LOCK_UN)
-    except Exception as e:
-      print(f'[Warning] Failed to write validation logs to {log_file}: {e}')
+    except OSError as e:
+      logging.warning('Failed to write validation logs to %s: %s', log_file, e)
 
   @property
   @abc.abstractmethod
@@ -196,6 +227,11 @@ class TaskEval(abc.ABC):
     """Initializes the task."""
     # Reset the interaction cache so previous tasks don't affect this run:
     env.interaction_cache = ""
+    # Storage left clean by the previous tear down can only be trusted by this
+    # task's own setup. Consuming the mark here means that a task that aborts
+    # before its tear down can never pass the mark on to the task after it.
+    env.skip_next_storage_clear = getattr(env, "storage_clean", False) is True
+    env.storage_clean = False
     self.initialize_device_time(env)
     self._initialize_apps(env)
     logging.info("Initializing %s", self.name)
@@ -234,6 +270,9 @@ class TaskEval(abc.ABC):
 
   def tear_down(self, env: interface.AsyncEnv) -> None:  # pylint: disable=unused-argument
     """Tears down the task."""
+    # The task may have written to storage since it was last cleared.
+    env.storage_clean = False
+    env.skip_next_storage_clear = False
     self._initialize_apps(env)
     try:
       adb_utils.close_recents(env.controller)
@@ -12,11 +12,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
 from typing import Any
 from unittest import mock
 from absl.testing import absltest
 from android_world.env import interface
 from android_world.task_evals import task_eval
+from android_world.task_evals.utils import user_data_generation
 from android_world.utils import test_utils
 
 
@@ -53,6 +55,18 @@ class MockTaskEval(task_eval.TaskEval):
     return 1.0
 
 
+class MockFileTaskEval(MockTaskEval):
+  """Clears storage when set up and torn down, like the file tasks."""
+
+  def initialize_task(self, env: interface.AsyncEnv) -> None:
+    super().initialize_task(env)
+    user_data_generation.clear_device_storage(env)
+
+  def tear_down(self, env: interface.AsyncEnv) -> None:
+    super().tear_down(env)
+    user_data_generation.clear_device_storage(env, mark_clean=True)
+
+
 class TestTaskEval(test_utils.AdbEvalTestBase):
 
   def setUp(self):
@@ -86,6 +100,61 @@ class TestTaskEval(test_utils.AdbEvalTestBase):
     self.scripted_task.tear_down(self.mock_env)
     self.mock_close_recents.assert_called_once()
 
+  @mock.patch.object(user_data_generation, "clear_internal_storage")
+  def test_storage_clear_skipped_after_tear_down(self, mock_clear):
+    env = test_utils.FakeAsyncEnv()
+    first = MockFileTaskEval(self.params)
+    first.initialize_task(env)
+    first.tear_down(env)
+    self.assertEqual(mock_clear.call_count, 2)
+
+    MockFileTaskEval(self.params).initialize_task(env)
+
+    self.assertEqual(mock_clear.call_count, 2)
+
+  @mock.patch.object(user_data_generation, "clear_internal_storage")
+  def test_storage_cleared_after_aborted_task(self, mock_clear):
+    env = test_utils.FakeAsyncEnv()
+    first = MockFileTaskEval(self.params)
+    first.initialize_task(env)
+    first.tear_down(env)
+    self.assertEqual(mock_clear.call_count, 2)
+
+    # A task that does not clear storage itself aborts before its tear down,
+    # possibly leaving files behind.
+    MockTaskEval(self.params).initialize_task(env)
+    MockFileTaskEval(self.params).initialize_task(env)
+
+    self.assertEqual(mock_clear.call_count, 3)
+
+  def test_validation_logs_are_formatted_when_printed(self):
+    self.scripted_task.add_validation_log("  - Actual: %r", "a%b")
+    self.scripted_task.add_validation_log("  - 100% done")
+
+    with mock.patch("builtins.print") as mock_print:
+      self.scripted_task.print_validation_logs()
+
+    printed = [c.args[0] for c in mock_print.call_args_list]
+    self.assertIn("  - Actual: 'a%b'", printed)
+    self.assertIn("  - 100% done", printed)
+
+  @mock.patch.dict(os.environ, {"ANDROID_WORLD_VERBOSE_EVAL": "0"})
+  def test_validation_logs_disabled(self):
+    self.scripted_task.add_validation_log("  - Actual: %r", "text")
+
+    with mock.patch("builtins.print") as mock_print:
+      self.scripted_task.print_validation_logs()
+
+    mock_print.assert_not_called()
+
+  def test_validation_log_format_errors_are_raised(self):
+    self.scripted_task.add_validation_log("  - Actual: %d", "text")
+
+    with mock.patch("builtins.print"):
+      with self.assertRaises(TypeError):
+        self.scripted_task.print_validation_logs()
+    self.assertEmpty(self.scripted_task._validation_logs)
+
 
 if __name__ == "__main__":
   absltest.main()
@@ -20,6 +20,7 @@ import logging
 import os
 import random
 import re
+import shlex
 import string
 from android_env import env_interface
 from android_world.env import adb_utils
@@ -85,6 +86,46 @@ def generate_noise_files(
       file names.
     n: Maximum number of files.
   """
+  # Create the directory and all files in a single adb call.
+  script = "; ".join([
+      f"mkdir -p {shlex.quote(directory_path)}",
+      *generate_noise_files_script(
+          base_file_name, directory_path, variant_names, n
+      ),
+  ])
+  adb_utils.issue_generic_request(["shell", script], env)
+
+
+def generate_noise_files_script(
+    base_file_name: str,
+    directory_path: str,
+    variant_names: list[str],
+    n: int = 20,
+) -> list[str]:
+  """Returns shell commands that create noise files like `generate_noise_files`.
+
+  This lets callers create the noise files as part of a larger script issued
+  in one adb call. The directory must already exist when the commands run.
+
+  Args:
+    base_file_name: Each file will be variations of this.
+    directory_path: Location to create the file.
+    variant_names: Variant file names that will be used to create additional
+      file names.
+    n: Maximum number of files.
+  """
+  return [
+      file_utils.create_file_command(filename, directory_path)
+      for filename in _generate_noise_file_names(
+          base_file_name, variant_names, n
+      )
+  ]
+
+
+def _generate_noise_file_names(
+    base_file_name: str, variant_names: list[str], n: int
+) -> set[str]:
+  """Returns up to n random file names that are variants of the inputs."""
   assert variant_names
   num_random_files = random.randint(1, n)
   names = set()
@@ -100,9 +141,7 @@ def generate_noise_files(
       _, extension = os.path.splitext(random.choice(variant_names))
       filename += extension
     names.add(filename)
-
-  for filename in names:
-    file_utils.create_file(filename, directory_path, env)
+  return names
 
 
 def generate_modified_file_name(base_file_name: str) -> str:
@@ -479,10 +518,28 @@ def _clear_external_downloads(env: interface.AsyncEnv) -> None:
   )
 
 
-def clear_device_storage(env: interface.AsyncEnv) -> None:
-  """Clears commonly used storage locations on device."""
+def clear_device_storage(
+    env: interface.AsyncEnv, mark_clean: bool = False
+) -> None:
+  """Clears commonly used storage locations on device.
+
+  If the previous task's tear down marked the storage as clean, the first call
+  while initializing the next task is skipped. See
+  `TaskEval.initialize_task`, which only allows this for the task that is
+  initialized right after that tear down.
+
+  Args:
+    env: The environment.
+    mark_clean: Whether to record that storage is clean after clearing it. Only
+      set this when nothing else touches storage before the next task starts,
+      e.g. at the end of a tear down.
+  """
+  if getattr(env, "skip_next_storage_clear", False) is True:
+    env.skip_next_storage_clear = False
+    return
   clear_internal_storage(env)
   _clear_external_downloads(env)
+  env.storage_clean = mark_clean
 
 
 # Family names taken verbatim from
@@ -13,7 +13,10 @@
 # limitations under the License.
 
 import tempfile
+from unittest import mock
+
 from absl.testing import absltest
+from android_world.env import adb_utils
 from android_world.task_evals.utils import user_data_generation
 from android_world.utils import file_utils
 import cv2
@@ -60,5 +63,58 @@ class TestCreateMpegWithMessages(absltest.TestCase):
     self.assertEqual(total_frames, 300)
 
 
+class TestGenerateNoiseFilesScript(absltest.TestCase):
+
+  def test_commands_write_into_directory(self):
+    commands = user_data_generation.generate_noise_files_script(
+        "note.md", "/sdcard/My Notes", ["Shopping List.md"], n=5
+    )
+
+    self.assertNotEmpty(commands)
+    self.assertLessEqual(len(commands), 5)
+    for command in commands:
+      self.assertStartsWith(command, "echo ")
+      self.assertIn("> '/sdcard/My Notes/", command)
+
+
+class TestGenerateNoiseFiles(absltest.TestCase):
+
+  @mock.patch.object(adb_utils, "issue_generic_request")
+  def test_creates_files_in_one_call(self, mock_request):
+    user_data_generation.generate_noise_files(
+        "note.md", "/sdcard/My Notes", mock.MagicMock(), ["Shopping List.md"]
+    )
+
+    mock_request.assert_called_once()
+    args = mock_request.call_args.args[0]
+    self.assertEqual(args[0], "shell")
+    self.assertStartsWith(args[1], "mkdir -p '/sdcard/My Notes'; echo ")
+
+
+class TestClearDeviceStorage(absltest.TestCase):
+
+  @mock.patch.object(adb_utils, "issue_generic_request")
+  def test_mark_clean(self, mock_request):
+    env = mock.MagicMock()
+    env.skip_next_storage_clear = False
+
+    user_data_generation.clear_device_storage(env, mark_clean=True)
+
+    self.assertEqual(mock_request.call_count, 2)
+    self.assertTrue(env.storage_clean)
+
+  @mock.patch.object(adb_utils, "issue_generic_request")
+  def test_skip_is_used_once(self, mock_request):
+    env = mock.MagicMock()
+    env.skip_next_storage_clear = True
+
+    user_data_generation.clear_device_storage(env)
+    mock_request.assert_not_called()
+    user_data_generation.clear_device_storage(env)
+
+    self.assertEqual(mock_request.call_count, 2)
+    self.assertFalse(env.skip_next_storage_clear)
+
+
 if __name__ == "__main__":
   absltest.main()
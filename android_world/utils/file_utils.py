@@ -20,11 +20,13 @@ import datetime
 import os
 import pathlib
 import random
+import shlex
 import shutil
 import string
 import tempfile
 from typing import Iterator
 from typing import Optional
+from typing import Sequence
 
 from absl import logging
 from android_env import env_interface
@@ -34,6 +36,68 @@ from android_world.env import adb_utils
 from android_world.utils import fuzzy_match_lib
 
 
+class StatCache:
+  """Reuses directory listings made by `check_file_or_folder_exists`.
+
+  While a StatCache is active, each base path is listed on the device at most
+  once and further lookups under it are answered from memory. Changes made
+  through `create_file`, `mkdir`, `clear_directory` and `remove_single_file`
+  invalidate the affected listings. Changes made any other way, e.g. by the
+  agent or by raw adb calls, are not seen until the cache is exited, so keep
+  the scope short, such as a single `is_successful` call:
+
+    with file_utils.StatCache():
+      original_exists = file_utils.check_file_or_folder_exists(...)
+      new_exists = file_utils.check_file_or_folder_exists(...)
+  """
+
+  def __init__(self):
+    # Maps (id(env), base_path) to the paths under base_path, or None if
+    # base_path does not exist.
+    self._listings: dict[tuple[int, str], Optional[frozenset[bytes]]] = {}
+    self._previous: Optional[StatCache] = None
+
+  def __enter__(self) -> "StatCache":
+    global _active_stat_cache
+    self._previous = _active_stat_cache
+    _active_stat_cache = self
+    return self
+
+  def __exit__(self, *unused_exc_info) -> None:
+    global _active_stat_cache
+    _active_stat_cache = self._previous
+    self._listings.clear()
+
+  def list_files_and_folders(
+      self, base_path: str, env: env_interface.AndroidEnvInterface
+  ) -> Optional[frozenset[bytes]]:
+    """Returns the cached recursive listing of base_path, fetching it once."""
+    key = (id(env), base_path)
+    if key not in self._listings:
+      self._listings[key] = _list_files_and_folders(base_path, env)
+    return self._listings[key]
+
+  def invalidate(self, path: str) -> None:
+    """Drops cached listings that contain, or are contained in, `path`."""
+    path = convert_to_posix_path(path)
+    for key in list(self._listings):
+      base_path = convert_to_posix_path(key[1])
+      if (
+          path == base_path
+          or path.startswith(base_path + "/")
+          or base_path.startswith(path + "/")
+      ):
+        del self._listings[key]
+
+
+_active_stat_cache: Optional[StatCache] = None
+
+
+def _invalidate_stat_cache(path: str) -> None:
+  if _active_stat_cache is not None:
+    _active_stat_cache.invalidate(path)
+
+
 def get_local_tmp_directory() -> str:
   """Returns the local temporary directory path.
 
@@ -93,6 +157,7 @@ def remove_single_file(
           ["shell", "rm", "-r", convert_to_posix_path(base_path, target)],
           env,
       )
+      _invalidate_stat_cache(convert_to_posix_path(base_path, target))
   else:
     logging.warn(
         "Base path %s does not exist, ignoring remove_single_file.", base_path
@@ -119,9 +184,8 @@ def clear_directory(
   res = adb_utils.issue_generic_request(
       ["shell", "ls", "-1", directory_path], env
   )
-  folder_contents = res.generic.output.decode().replace("\r", "").strip()
-
-  if folder_contents:
+  if res.generic.output.strip():
+    _invalidate_stat_cache(directory_path)
     adb_utils.check_ok(
         adb_utils.issue_generic_request(
             ["shell", "rm", "-r", f"{directory_path}/*"],
@@ -131,6 +195,38 @@ def clear_directory(
     )
 
 
+def clear_directories(
+    directory_paths: Sequence[str],
+    env: env_interface.AndroidEnvInterface,
+    then: Sequence[str] = (),
+) -> None:
+  """Removes all files in each of the folders with a single adb call.
+
+  Unlike `clear_directory`, this does not check whether the folders exist or
+  are empty first; missing folders are ignored.
+
+  Args:
+    directory_paths: The folders to clear.
+    env: The environment to use.
+    then: Optional shell command, as a list of already quoted arguments, to run
+      in the same adb call once the folders have been cleared.
+
+  Raises:
+    RuntimeError when a failure occured while deleting files.
+  """
+  for directory_path in directory_paths:
+    _invalidate_stat_cache(directory_path)
+  args = ["shell", "rm", "-rf"] + [
+      f"{shlex.quote(path)}/*" for path in directory_paths
+  ]
+  if then:
+    args += ["&&", *then]
+  adb_utils.check_ok(
+      adb_utils.issue_generic_request(args, env),
+      f"Failed to clear directories {directory_paths}.",
+  )
+
+
 def create_file(
     file_name: str,
     directory_path: str,
@@ -156,6 +252,7 @@ def create_file(
   # Escape quotes to avoid issues with writing them to file.
   content = content.replace("'", "'\"'\"'")
   mkdir(directory_path, env)
+  _invalidate_stat_cache(convert_to_posix_path(directory_path, file_name))
   adb_utils.issue_generic_request(
       [
           "shell",
@@ -169,6 +266,30 @@ def create_file(
   return content
 
 
+def create_file_command(
+    file_name: str, directory_path: str, content: str = ""
+) -> str:
+  """Returns a shell command that creates a file, for use in larger scripts.
+
+  Unlike `create_file`, the directory is not created first.
+
+  Args:
+    file_name: Name of file.
+    directory_path: Location to create the file.
+    content: The contents to write to the file. If nothing is provided, then
+      random text will be added.
+
+  Returns:
+    The shell command.
+  """
+  if not content:
+    content = "".join(
+        random.choices(string.ascii_letters + string.digits, k=20)
+    )
+  path = convert_to_posix_path(directory_path, file_name)
+  return f"echo {shlex.quote(content)} > {shlex.quote(path)}"
+
+
 def mkdir(directory_path: str, env: env_interface.AndroidEnvInterface) -> None:
   """Makes a directory using adb.
 
@@ -179,6 +300,7 @@ def mkdir(directory_path: str, env: env_interface.AndroidEnvInterface) -> None:
   Raises:
     RuntimeError when directory could not be created.
   """
+  _invalidate_stat_cache(directory_path)
   adb_utils.check_ok(
       adb_utils.issue_generic_request(
           [
@@ -241,8 +363,23 @@ def check_file_or_folder_exists(
   Raises:
     RuntimeError: When ADB does not correctly execute.
   """
-  if not check_directory_exists(base_path, env):
+  if _active_stat_cache is not None:
+    all_paths = _active_stat_cache.list_files_and_folders(base_path, env)
+  else:
+    all_paths = _list_files_and_folders(base_path, env)
+
+  if all_paths is None:
     return False
+  full_target_path = convert_to_posix_path(base_path, target)
+  return full_target_path.encode() in all_paths
+
+
+def _list_files_and_folders(
+    base_path: str, env: env_interface.AndroidEnvInterface
+) -> Optional[frozenset[bytes]]:
+  """Recursively lists base_path, or returns None if it does not exist."""
+  if not check_directory_exists(base_path, env):
+    return None
 
   # List all files and folders recursively under the base path
   res = adb_utils.issue_generic_request(
@@ -252,10 +389,63 @@ def check_file_or_folder_exists(
   if not res.status:
     raise RuntimeError("ADB command failed.")
 
-  all_paths = set(res.generic.output.decode().replace("\r", "").split("\n"))
+  return frozenset(res.generic.output.splitlines())
 
-  full_target_path = convert_to_posix_path(base_path, target)
-  return full_target_path in all_paths
+
+def exists_condition(path: str) -> str:
+  """Returns a shell condition that is true if path exists on the device.
+
+  Shared storage on Android is case-insensitive, so `[ -e path ]` would also
+  accept an entry whose name only differs in case. Like
+  `check_file_or_folder_exists`, this instead matches the exact name against
+  the listing of the parent directory.
+
+  Args:
+    path: Full path of the file or folder.
+
+  Returns:
+    The condition, for use in `if` statements of larger scripts.
+  """
+  posix_path = pathlib.PurePosixPath(path)
+  return (
+      f"ls -1a {shlex.quote(str(posix_path.parent))} 2>/dev/null"
+      f" | grep -Fxq -- {shlex.quote(posix_path.name)}"
+  )
+
+
+def check_files_or_folders_exist(
+    paths: Sequence[str], env: env_interface.AndroidEnvInterface
+) -> list[bool]:
+  """Checks whether each of the given paths exists, using a single adb call.
+
+  Unlike `check_file_or_folder_exists`, which needs one call to check the base
+  directory and another to list it, all tests run in one `adb shell` script.
+  Names are matched exactly, see `exists_condition`.
+
+  Args:
+    paths: Full paths of the files or folders to check.
+    env: The Android environment interface.
+
+  Returns:
+    Whether each path exists, in the same order as `paths`.
+
+  Raises:
+    RuntimeError: When ADB does not correctly execute.
+  """
+  script = "; ".join(
+      f"if {exists_condition(path)}; then echo 1; else echo 0; fi"
+      for path in paths
+  )
+  res = adb_utils.issue_generic_request(["shell", script], env)
+  if not res.status:
+    raise RuntimeError("ADB command failed.")
+
+  results = res.generic.output.split()
+  if len(results) != len(paths):
+    raise RuntimeError(
+        f"Unexpected output from existence check: {res.generic.output!r}"
+    )
+  return [result == b"1" for result in results]
 
 
 def check_file_exists(
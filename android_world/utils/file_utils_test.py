@@ -15,6 +15,7 @@
 import datetime
 import os
 import shutil
+import subprocess
 import tempfile
 from unittest import mock
 
@@ -259,6 +260,136 @@ class FilesTest(parameterized.TestCase):
     )
     self.assertTrue(res)
 
+  @mock.patch.object(file_utils, 'check_directory_exists', return_value=True)
+  def test_stat_cache_reuses_listing(self, unused_mock_check_directory_exists):
+    self.mock_issue_generic_request.return_value = adb_pb2.AdbResponse(
+        status=adb_pb2.AdbResponse.Status.OK,
+        generic=adb_pb2.AdbResponse.GenericResponse(
+            output=b'/sdcard/notes\n/sdcard/notes/a.md\n'
+        ),
+    )
+
+    with file_utils.StatCache():
+      self.assertTrue(
+          file_utils.check_file_or_folder_exists(
+              'a.md', '/sdcard/notes', self.mock_env
+          )
+      )
+      self.assertFalse(
+          file_utils.check_file_or_folder_exists(
+              'b.md', '/sdcard/notes', self.mock_env
+          )
+      )
+      self.assertEqual(self.mock_issue_generic_request.call_count, 1)
+
+      file_utils.mkdir('/sdcard/notes/sub', self.mock_env)
+      file_utils.check_file_or_folder_exists(
+          'a.md', '/sdcard/notes', self.mock_env
+      )
+      # One call for mkdir and one to list the directory again.
+      self.assertEqual(self.mock_issue_generic_request.call_count, 3)
+
+    file_utils.check_file_or_folder_exists(
+        'a.md', '/sdcard/notes', self.mock_env
+    )
+    self.assertEqual(self.mock_issue_generic_request.call_count, 4)
+
+  def test_clear_directories(self):
+    self.mock_issue_generic_request.return_value = adb_pb2.AdbResponse(
+        status=adb_pb2.AdbResponse.Status.OK
+    )
+
+    file_utils.clear_directories(
+        ['/sdcard/Pictures', '/sdcard/My Movies'], self.mock_env
+    )
+
+    self.mock_issue_generic_request.assert_called_once_with(
+        ['shell', 'rm', '-rf', '/sdcard/Pictures/*', "'/sdcard/My Movies'/*"],
+        self.mock_env,
+    )
+
+  def test_clear_directories_then(self):
+    self.mock_issue_generic_request.return_value = adb_pb2.AdbResponse(
+        status=adb_pb2.AdbResponse.Status.OK
+    )
+
+    file_utils.clear_directories(
+        ['/sdcard/Pictures'], self.mock_env, then=['touch', '/tmp/marker']
+    )
+
+    self.mock_issue_generic_request.assert_called_once_with(
+        [
+            'shell',
+            'rm',
+            '-rf',
+            '/sdcard/Pictures/*',
+            '&&',
+            'touch',
+            '/tmp/marker',
+        ],
+        self.mock_env,
+    )
+
+  def test_check_files_or_folders_exist(self):
+    self.mock_issue_generic_request.return_value = adb_pb2.AdbResponse(
+        status=adb_pb2.AdbResponse.Status.OK,
+        generic=adb_pb2.AdbResponse.GenericResponse(output=b'1\r\n0\r\n'),
+    )
+
+    res = file_utils.check_files_or_folders_exist(
+        ['/sdcard/a.txt', '/sdcard/my dir/b.txt'], self.mock_env
+    )
+
+    self.assertEqual(res, [True, False])
+    self.mock_issue_generic_request.assert_called_once()
+    script = self.mock_issue_generic_request.call_args.args[0][1]
+    self.assertIn("'/sdcard/my dir'", script)
+
+  def test_check_files_or_folders_exist_matches_exact_name(self):
+    directory = tempfile.mkdtemp()
+    self.addCleanup(shutil.rmtree, directory)
+    create_file_with_contents(os.path.join(directory, 'note.md'), b'')
+    os.mkdir(os.path.join(directory, 'My Folder'))
+
+    def run_locally(args, env):
+      del env
+      return adb_pb2.AdbResponse(
+          status=adb_pb2.AdbResponse.Status.OK,
+          generic=adb_pb2.AdbResponse.GenericResponse(
+              output=subprocess.run(
+                  ['sh', '-c', args[1]], capture_output=True, check=True
+              ).stdout
+          ),
+      )
+
+    self.mock_issue_generic_request.side_effect = run_locally
+
+    res = file_utils.check_files_or_folders_exist(
+        [
+            os.path.join(directory, 'note.md'),
+            os.path.join(directory, 'Note.md'),
+            os.path.join(directory, 'My Folder'),
+            os.path.join(directory, 'missing', 'note.md'),
+        ],
+        self.mock_env,
+    )
+
+    self.assertEqual(res, [True, False, True, False])
+    # Shared storage is case-insensitive, so `[ -e ]` would accept 'Note.md'.
+    script = self.mock_issue_generic_request.call_args.args[0][1]
+    self.assertNotIn('[ -e', script)
+
+  def test_check_files_or_folders_exist_unexpected_output(self):
+    self.mock_issue_generic_request.return_value = adb_pb2.AdbResponse(
+        status=adb_pb2.AdbResponse.Status.OK,
+        generic=adb_pb2.AdbResponse.GenericResponse(output=b'1\n'),
+    )
+
+    with self.assertRaises(RuntimeError):
+      file_utils.check_files_or_folders_exist(
+          ['/sdcard/a.txt', '/sdcard/b.txt'], self.mock_env
+      )
+
 
 if __name__ == '__main__':
   absltest.main()
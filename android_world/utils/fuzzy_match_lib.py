@@ -22,6 +22,20 @@ import difflib
 _MIN_DIFF_SIMILARITY = 0.9
 
 
+def normalize(text: str, ignore_case: bool = True) -> str:
+  """Normalizes text the way `fuzzy_match` does before comparing it.
+
+  Args:
+    text: The text to normalize.
+    ignore_case: Whether comparisons will ignore case.
+
+  Returns:
+    The normalized text.
+  """
+  text = str(text)
+  return text.lower() if ignore_case else text
+
+
 def fuzzy_match(text1: str, text2: str, ignore_case: bool = True) -> bool:
   """Compares two strings.
 
@@ -35,17 +49,32 @@ def fuzzy_match(text1: str, text2: str, ignore_case: bool = True) -> bool:
   """
   if text1 is None or text2 is None:
     return False
-  text1 = str(text1)
-  text2 = str(text2)
+  return fuzzy_match_prenormalized(
+      text1, normalize(text2, ignore_case), ignore_case=ignore_case
+  )
+
 
-  def text_similarity(text1: str, text2: str, ignore_case: bool) -> float:
-    """Computes similiarity between two texts."""
-    if ignore_case:
-      text1 = text1.lower()
-      text2 = text2.lower()
+def fuzzy_match_prenormalized(
+    text: str, normalized_expected: str, ignore_case: bool = True
+) -> bool:
+  """Compares a string against one already passed through `normalize`.
 
-    return difflib.SequenceMatcher(None, text1, text2).ratio()
+  Useful when the same expected text is compared repeatedly.
+
+  Args:
+    text: The text to compare.
+    normalized_expected: The expected text, as returned by `normalize` with the
+      same ignore_case.
+    ignore_case: Whether to ignore case during comparison.
+
+  Returns:
+    Whether the two strings are approximately equal.
+  """
+  if text is None or normalized_expected is None:
+    return False
   return (
-      text_similarity(text1, text2, ignore_case=ignore_case)
+      difflib.SequenceMatcher(
+          None, normalize(text, ignore_case), normalized_expected
+      ).ratio()
       >= _MIN_DIFF_SIMILARITY
   )
@@ -14,6 +14,7 @@
 
 """Mocks for agents."""
 
+import os
 import random
 import time
 from typing import Any
@@ -121,6 +122,18 @@ class AdbEvalTestBase(absltest.TestCase):
     self.mock_check_file_or_folder_exists = mock.patch.object(
         file_utils, 'check_file_or_folder_exists'
     ).start()
+    # By default, answer batched existence checks one path at a time through
+    # `mock_check_file_or_folder_exists`.
+    self.mock_check_files_or_folders_exist = mock.patch.object(
+        file_utils,
+        'check_files_or_folders_exist',
+        side_effect=lambda paths, env: [
+            self.mock_check_file_or_folder_exists(
+                os.path.basename(path), os.path.dirname(path), env
+            )
+            for path in paths
+        ],
+    ).start()
     self.mock_check_file_exists = mock.patch.object(
         file_utils, 'check_file_exists'
     ).start()
@@ -129,6 +129,7 @@ def _main() -> None:
       f'{"Task Successful ✅" if agent_successful else "Task Failed ❌"};'
       f' {task.goal}'
   )
+  agent.close()
   env.close()
 
 
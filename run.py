@@ -247,6 +247,8 @@ def _main() -> None:
       f'Finished running agent {_AGENT_NAME.value} on {_SUITE_FAMILY.value}'
       f' family. Wrote to {checkpoint_dir}.'
   )
+  if isinstance(agent, midscene.MidsceneAgent):
+    agent.close()
   env.close()
 
 
@@ -1,6 +1,21 @@
 
 import subprocess
-import re
+
+RESULT_START = "___ANDROID_WORLD_RESULT_START___"
+RESULT_END = "___ANDROID_WORLD_RESULT_END___"
+
+
+def extract_result(stdout):
+    """Returns the stripped text between the result markers, or None."""
+    start = stdout.find(RESULT_START)
+    if start == -1:
+        return None
+    start += len(RESULT_START)
+    end = stdout.find(RESULT_END, start)
+    if end == -1:
+        return None
+    return stdout[start:end].strip()
+
 
 def test_subprocess_regex():
     # Echo a string that matches the pattern
@@ -14,14 +29,14 @@ def test_subprocess_regex():
     print(f"Type of res.stdout: {type(res.stdout)}")
     print(f"res.stdout: {res.stdout!r}")
 
-    pattern = r"___ANDROID_WORLD_RESULT_START___\s*(.*?)\s*___ANDROID_WORLD_RESULT_END___"
-    match = re.search(pattern, res.stdout, re.DOTALL)
+    payload = extract_result(res.stdout)
     
-    if match:
+    if payload is not None:
         print("Match found!")
-        print(f"Group 1: {match.group(1)}")
+        print(f"Group 1: {payload}")
     else:
         print("No match found.")
+    assert payload == "{\"code\": 1, \"data\": {}}"
 
 if __name__ == "__main__":
     test_subprocess_regex()